@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'app.core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,172 @@
+from functools import wraps
+from itertools import islice
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections, transaction
+from django.http import HttpRequest, HttpResponse
+from django.urls import URLPattern
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from asgiref.sync import sync_to_async
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .catalog import get_catalog_version
+
+# Асинхронный обработчик чтения. Возвращает None, если запрос должен
+# обработать синхронный вьюсет (ошибки, редкие режимы и форматы ответа).
+AsyncReadHandler = Callable[..., Awaitable[HttpResponse | None]]
+
+
+async def aauthenticate(request: HttpRequest) -> bool:
+    """Асинхронная аутентификация по токену, как `TokenAuthentication`.
+    Возвращает False для недействительного токена: ответ с ошибкой
+    формирует синхронный вьюсет."""
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        request.user = AnonymousUser()
+        return True
+    if len(auth) != 2:
+        return False
+    try:
+        token = await Token.objects.select_related('user').aget(key=auth[1])
+    except Token.DoesNotExist:
+        return False
+    if not token.user.is_active:
+        return False
+    request.user = token.user
+    return True
+
+
+def accepts_json(request: HttpRequest) -> bool:
+    """Ожидает ли клиент json, а не browsable API"""
+    return (
+        request.GET.get('format', 'json') == 'json'
+        and 'text/html' not in request.headers.get('Accept', '')
+    )
+
+
+def drf_request(request: HttpRequest) -> Request:
+    """Обертка DRF над запросом для сериализаторов, фильтров и пагинации.
+    Пользователь уже определен `aauthenticate`."""
+    wrapped = Request(request)
+    wrapped.user = request.user
+    return wrapped
+
+
+def json_response(data=None, content: bytes | None = None) -> HttpResponse:
+    """Ответ в json, совпадающий с ответом вьюсета. `content` - уже
+    отрендеренный ответ, например из кеша."""
+    if content is None:
+        content = JSONRenderer().render(data)
+    response = HttpResponse(content, content_type=JSONRenderer.media_type)
+    # Тот же адрес отдает browsable API при `Accept: text/html`.
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+async def catalog_response(
+        request: HttpRequest,
+        catalog: str,
+        get_data: Callable[[], Awaitable],
+) -> HttpResponse | None:
+    """Ответ справочника с поддержкой условных запросов по версии
+    справочника, как у `catalog_condition`. Данные запрашиваются у
+    `get_data` только если у клиента нет актуальной версии."""
+    version = await sync_to_async(get_catalog_version)(catalog)
+    etag = f'"{catalog}-{version}-json"'
+    last_modified = int(version)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        data = await get_data()
+        if data is None:
+            return None
+        response = json_response(data)
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+async def aiterate(
+        iterator: Iterator[bytes], batch_size: int
+) -> AsyncIterator[bytes]:
+    """Асинхронный итератор над синхронным итератором потокового ответа.
+    В режиме ASGI Django собирает синхронный потоковый ответ в список
+    целиком до отправки первого байта, асинхронный отдается по частям.
+    Части читаются пачками в потоке запроса (`thread_sensitive`), где
+    открыто соединение с базой данных и серверный курсор."""
+    next_batch = sync_to_async(
+        lambda: list(islice(iterator, batch_size)), thread_sensitive=True
+    )
+    try:
+        while batch := await next_batch():
+            for part in batch:
+                yield part
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def atomic_requests(view: Callable) -> Callable:
+    """Оборачивает синхронную вьюху в транзакции баз данных с
+    ATOMIC_REQUESTS, как это делает Django для вьюх из урлов"""
+    non_atomic_requests = getattr(view, '_non_atomic_requests', set())
+    for alias, settings_dict in connections.settings.items():
+        if (
+            settings_dict['ATOMIC_REQUESTS']
+            and alias not in non_atomic_requests
+        ):
+            view = transaction.atomic(using=alias)(view)
+    return view
+
+
+def async_reads(sync_view: Callable, handler: AsyncReadHandler) -> Callable:
+    """Вьюха, которая обрабатывает GET и HEAD запросы за json асинхронным
+    обработчиком, а остальные запросы - синхронным вьюсетом в потоке.
+    Django не оборачивает асинхронные вьюхи в транзакцию ATOMIC_REQUESTS,
+    поэтому синхронный вьюсет оборачивается явно."""
+    atomic_sync_view = atomic_requests(sync_view)
+
+    @wraps(sync_view)
+    async def view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if (
+            request.method in ('GET', 'HEAD')
+            and 'format' not in kwargs
+            and accepts_json(request)
+            and await aauthenticate(request)
+        ):
+            response = await handler(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await sync_to_async(atomic_sync_view)(
+            request, *args, **kwargs
+        )
+
+    view._non_atomic_requests = set(connections.settings)
+    return view
+
+
+def with_async_reads(
+        urlpatterns: list, handlers: dict[str, AsyncReadHandler]
+) -> list:
+    """Подменяет вьюхи урлов с именами из `handlers` на `async_reads` при
+    работе в режиме ASGI"""
+    if not settings.ASYNC_READ_VIEWS:
+        return urlpatterns
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_reads(pattern.callback, handlers[pattern.name]),
+            pattern.default_args,
+            pattern.name,
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in handlers
+        else pattern
+        for pattern in urlpatterns
+    ]
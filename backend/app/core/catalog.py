@@ -0,0 +1,55 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+# Справочники, версия которых отслеживается.
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+
+
+def catalog_version_key(catalog: str) -> str:
+    """Ключ версии справочника в кеше"""
+    return f'catalog-version:{catalog}'
+
+
+def get_catalog_version(catalog: str) -> float:
+    """Версия справочника: время последнего изменения (unix time). Версия
+    хранится в общем кеше, поэтому изменение справочника в одном воркере
+    видно остальным."""
+    return cache.get_or_set(
+        catalog_version_key(catalog), time.time(), timeout=None
+    )
+
+
+def bump_catalog_version(catalog: str) -> None:
+    """Обновляет версию справочника после фиксации текущей транзакции"""
+    transaction.on_commit(lambda: cache.set(
+        catalog_version_key(catalog), time.time(), timeout=None
+    ))
+
+
+def catalog_condition(catalog: str):
+    """Декоратор метода вьюсета справочника: отвечает 304 на
+    `If-None-Match`/`If-Modified-Since` по версии справочника, не выполняя
+    метод (запросы к базе данных и сериализацию). ETag учитывает формат
+    ответа, чтобы JSON и browsable API не подменяли друг друга в кеше
+    клиента."""
+    def etag(request, *args, **kwargs) -> str:
+        renderer = getattr(request, 'accepted_renderer', None)
+        response_format = renderer.format if renderer else ''
+        return (
+            f'"{catalog}-{get_catalog_version(catalog)}-{response_format}"'
+        )
+
+    def last_modified(request, *args, **kwargs) -> datetime:
+        return datetime.fromtimestamp(
+            get_catalog_version(catalog), tz=timezone.utc
+        )
+
+    return method_decorator(
+        condition(etag_func=etag, last_modified_func=last_modified)
+    )
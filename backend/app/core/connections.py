@@ -0,0 +1,50 @@
+from collections import Counter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from foodgram_backend import constants
+
+# Статистика соединений с базой данных текущего процесса (воркера
+# gunicorn): количество обработанных запросов и открытых соединений по
+# алиасам баз данных.
+stats = Counter()
+
+
+def connection_stats() -> dict[str, int]:
+    """Статистика соединений процесса. `reused` - сколько запросов
+    обслужено уже открытым соединением основной базы данных."""
+    result = dict(stats)
+    result['reused'] = max(stats['requests'] - stats['opened:default'], 0)
+    return result
+
+
+def check_connection_budget(pool_size: int) -> None:
+    """Проверяет, что пул постоянных соединений воркеров (`pool_size`
+    соединений с каждой базой данных) и резерв соединений помещаются в
+    `max_connections` каждого сервера Postgres. Иначе вызывает
+    ImproperlyConfigured: при нехватке соединений воркеры получали бы
+    ошибки подключения уже под нагрузкой."""
+    try:
+        for connection in connections.all():
+            if connection.vendor != 'postgresql':
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT current_setting('max_connections')::int"
+                    " - current_setting('superuser_reserved_connections')::int"
+                )
+                available = cursor.fetchone()[0]
+            required = pool_size + constants.DB_RESERVED_CONNECTIONS
+            if required > available:
+                raise ImproperlyConfigured(
+                    f'База данных {connection.alias}: нужно {required} '
+                    f'соединений ({pool_size} для воркеров и '
+                    f'{constants.DB_RESERVED_CONNECTIONS} в резерве), '
+                    f'сервер допускает {available}. Уменьшите '
+                    f'GUNICORN_WORKERS или увеличьте max_connections.'
+                )
+    finally:
+        # Проверка выполняется в мастер-процессе gunicorn до запуска
+        # воркеров, соединения не должны наследоваться воркерами.
+        connections.close_all()
@@ -0,0 +1,40 @@
+from typing import Iterable, Type
+
+from django.db.models import Count, F, Model, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def change_counter(
+        model: Type[Model], field: str, pks: Iterable[int], delta: int = 1
+) -> None:
+    """Атомарно изменяет счетчик `field` объектов `pks` на `delta` одним
+    UPDATE с `F()`. Счетчик не становится меньше нуля."""
+    pks = list(pks)
+    if not pks or not delta:
+        return
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def delete_without_signals(queryset: QuerySet) -> int:
+    """Удаляет записи запроса одним DELETE без сигналов `pre_delete` и
+    `post_delete`. Для массовых операций, которые сами изменяют счетчики
+    и производные данные одним запросом вместо обработчика на каждую
+    запись. Каскадные удаления не выполняются, поэтому на модель не должны
+    ссылаться другие таблицы. Использует приватный `QuerySet._raw_delete`
+    Django 4.2: при обновлении Django проверить его сигнатуру."""
+    return queryset._raw_delete(queryset.db)
+
+
+def count_related(model: Type[Model], field: str) -> Coalesce:
+    """Подзапрос количества записей `model`, ссылающихся полем `field` на
+    запись внешнего запроса. Используется для пересчета счетчиков."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
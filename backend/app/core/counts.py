@@ -0,0 +1,101 @@
+import time
+from hashlib import md5
+from typing import Type
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import Model, QuerySet
+from django.db.models.sql.query import Query
+
+from foodgram_backend import constants
+from foodgram_backend.db_router import use_primary
+
+
+def table_version_key(table: str) -> str:
+    """Ключ версии таблицы для кеша количества записей"""
+    return f'count-version:{table}'
+
+
+def get_table_versions(tables: list[str]) -> dict[str, int]:
+    """Версии таблиц: время создания версии в наносекундах. Отсутствующие
+    (еще не созданные или вытесненные из кеша) версии создаются заново и
+    не совпадают ни с одной из прежних."""
+    keys = [table_version_key(table) for table in tables]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = cache.get_or_set(
+                key, time.time_ns(), timeout=None
+            )
+    return versions
+
+
+def invalidate_counts(*models: Type[Model]) -> None:
+    """Сбрасывает кеш количества записей для всех запросов, затрагивающих
+    таблицы указанных моделей, после фиксации текущей транзакции. Нужно
+    вызывать явно после `bulk_create` и `update`, которые не отправляют
+    сигналы."""
+    keys = [table_version_key(model._meta.db_table) for model in models]
+    transaction.on_commit(lambda: cache.set_many(
+        dict.fromkeys(keys, time.time_ns()), timeout=None
+    ))
+
+
+def query_tables(query: Query) -> set[str]:
+    """Таблицы запроса, включая таблицы подзапросов в условиях (`__in`
+    с запросом, `Exists`, `Subquery`) и аннотациях"""
+    tables = {join.table_name for join in query.alias_map.values()}
+    expressions = [query.where, *query.annotations.values()]
+    while expressions:
+        expression = expressions.pop()
+        if isinstance(expression, Query):
+            tables |= query_tables(expression)
+        elif hasattr(expression, 'get_source_expressions'):
+            expressions.extend(expression.get_source_expressions())
+        if isinstance(getattr(expression, 'query', None), Query):
+            tables |= query_tables(expression.query)
+    return tables
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """Оценка количества записей по статистике Postgres (`reltuples`) для
+    запросов без фильтров по большим таблицам. Для остальных запросов
+    возвращает None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < constants.APPROXIMATE_COUNT_THRESHOLD:
+        return None
+    return row[0]
+
+
+def cached_count(queryset: QuerySet) -> int:
+    """Количество записей запроса из кеша. Ключ зависит от SQL запроса с
+    параметрами (сигнатуры фильтров) и версий всех таблиц запроса и его
+    подзапросов, поэтому запись в любую из таблиц делает закешированное
+    значение недоступным."""
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    versions = get_table_versions(sorted(query_tables(queryset.query)))
+    signature = md5(
+        f'{sql}|{params}|{sorted(versions.items())}'.encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    key = f'count:{queryset.db}:{signature}'
+    count = cache.get(key)
+    if count is None:
+        # Значение кешируется под новыми версиями таблиц, поэтому его нельзя
+        # читать с реплики, которая может еще не получить изменения.
+        with use_primary():
+            count = queryset.count()
+        cache.set(key, count, constants.COUNT_CACHE_TIMEOUT)
+    return count
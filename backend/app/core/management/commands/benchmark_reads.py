@@ -0,0 +1,268 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from statistics import quantiles
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram_backend import constants
+
+# Режимы сервера: значение DJANGO_ASGI для gunicornconfig.py.
+MODES = {'wsgi': 'False', 'asgi': 'True'}
+
+
+class Endpoint:
+    """Результаты нагрузки на один адрес"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.timings = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def report(self) -> str:
+        """Строка отчета: пропускная способность и перцентили задержки"""
+        if len(self.timings) < 2:
+            return f'{self.name}: нет успешных ответов, ошибок {self.errors}'
+        p50, p95, p99 = (
+            quantiles(self.timings, n=100)[index] * 1000
+            for index in (49, 94, 98)
+        )
+        return (
+            f'{self.name}: {len(self.timings) / self.elapsed:.1f} req/s, '
+            f'p50 {p50:.1f} мс, p95 {p95:.1f} мс, p99 {p99:.1f} мс, '
+            f'ошибок {self.errors}'
+        )
+
+
+class Client:
+    """Минимальный HTTP/1.1 клиент на asyncio: одно соединение на запрос,
+    чтобы не зависеть от сторонних библиотек"""
+
+    def __init__(self, url: str, token: str | None):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.headers = f'Host: {parts.netloc}\r\nAccept: application/json\r\n'
+        if token:
+            self.headers += f'Authorization: Token {token}\r\n'
+
+    async def get(self, path: str) -> tuple[int, bytes]:
+        """Выполняет GET запрос, возвращает статус и тело ответа"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(
+                f'GET {path} HTTP/1.1\r\n{self.headers}'
+                'Connection: close\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return int(head.split(maxsplit=2)[1]), body
+
+    async def slow(self, stop: asyncio.Event) -> None:
+        """Медленный клиент: отправляет заголовки запроса по одному, пока
+        не закончится замер. Синхронный воркер занят им все это время."""
+        try:
+            _, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError:
+            return
+        try:
+            writer.write(f'GET /api/tags/ HTTP/1.1\r\n{self.headers}'.encode())
+            while not stop.is_set():
+                writer.write(b'X-Slow-Client: 1\r\n')
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(
+                        stop.wait(), constants.BENCHMARK_SLOW_CLIENT_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    """Нагрузочное сравнение эндпоинтов чтения в режимах WSGI и ASGI"""
+    help = "benchmark hot read endpoints under sync and async gunicorn"
+
+    def add_arguments(self, parser):
+        """Извлекаем аргументы из строки команды"""
+        parser.add_argument(
+            '--url',
+            help='адрес уже запущенного сервера; без него команда по '
+                 'очереди запускает gunicorn в режимах WSGI и ASGI',
+        )
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            choices=MODES,
+            default=list(MODES),
+            help='режимы сервера для сравнения',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=constants.BENCHMARK_PORT,
+            help='порт запускаемого сервера',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=constants.BENCHMARK_WORKERS,
+            help='количество воркеров запускаемого сервера',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=constants.BENCHMARK_REQUESTS,
+            help='количество запросов к каждому эндпоинту',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=constants.BENCHMARK_CONCURRENCY,
+            help='количество одновременных запросов',
+        )
+        parser.add_argument(
+            '--slow-clients',
+            type=int,
+            default=0,
+            help='количество медленных клиентов во время замера',
+        )
+        parser.add_argument(
+            '--token',
+            help='токен пользователя: запросы без кеша анонимных ответов '
+                 'и замер списка подписок',
+        )
+
+    def endpoints(self, client: Client, token: str | None) -> list[Endpoint]:
+        """Эндпоинты для замера. Id рецепта берется из списка рецептов."""
+        _, body = asyncio.run(client.get('/api/recipes/?limit=1'))
+        recipes = json.loads(body)['results']
+        endpoints = [
+            Endpoint('recipes list', '/api/recipes/'),
+            Endpoint('tags', '/api/tags/'),
+            Endpoint('ingredients', f'/api/ingredients/?name={quote("са")}'),
+        ]
+        if recipes:
+            endpoints.insert(1, Endpoint(
+                'recipe detail', f'/api/recipes/{recipes[0]["id"]}/'
+            ))
+        if token:
+            endpoints.append(
+                Endpoint('subscriptions', '/api/users/subscriptions/')
+            )
+        return endpoints
+
+    async def load(
+            self, client: Client, endpoint: Endpoint, options: dict
+    ) -> None:
+        """Выполняет запросы к эндпоинту с заданной конкурентностью"""
+        remaining = options['requests']
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    status, _ = await asyncio.wait_for(
+                        client.get(endpoint.path),
+                        constants.BENCHMARK_REQUEST_TIMEOUT,
+                    )
+                except (
+                    OSError, ValueError, IndexError, asyncio.TimeoutError
+                ):
+                    status = None
+                if status == 200:
+                    endpoint.timings.append(time.perf_counter() - start)
+                else:
+                    endpoint.errors += 1
+
+        stop = asyncio.Event()
+        slow_clients = [
+            asyncio.create_task(client.slow(stop))
+            for _ in range(options['slow_clients'])
+        ]
+        if slow_clients:
+            # Медленные клиенты занимают соединения до начала замера.
+            await asyncio.sleep(constants.BENCHMARK_SLOW_CLIENT_INTERVAL)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker() for _ in range(options['concurrency']))
+        )
+        endpoint.elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*slow_clients)
+
+    def benchmark(self, url: str, options: dict) -> list[Endpoint]:
+        """Замер всех эндпоинтов сервера"""
+        client = Client(url, options['token'])
+        endpoints = self.endpoints(client, options['token'])
+        for endpoint in endpoints:
+            asyncio.run(self.load(client, endpoint, options))
+        return endpoints
+
+    def start_server(self, mode: str, options: dict) -> subprocess.Popen:
+        """Запускает gunicorn с gunicornconfig.py в заданном режиме и ждет,
+        пока он начнет принимать соединения"""
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'python:gunicornconfig',
+                '--bind', f'127.0.0.1:{options["port"]}',
+                '--workers', str(options['workers']),
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_ASGI': MODES[mode]},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + constants.BENCHMARK_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Сервер в режиме {mode} не запустился')
+            try:
+                socket.create_connection(
+                    ('127.0.0.1', options['port']), timeout=1
+                ).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'Сервер в режиме {mode} не запустился')
+
+    def handle(self, *args, **options):
+        """Замеряем один сервер по адресу или сравниваем режимы"""
+        if options['url']:
+            for endpoint in self.benchmark(options['url'], options):
+                self.stdout.write(endpoint.report())
+            return
+        for mode in options['modes']:
+            server = self.start_server(mode, options)
+            try:
+                endpoints = self.benchmark(
+                    f'http://127.0.0.1:{options["port"]}', options
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            self.stdout.write(
+                f'{mode.upper()}, воркеров {options["workers"]}, '
+                f'одновременных запросов {options["concurrency"]}, '
+                f'медленных клиентов {options["slow_clients"]}:'
+            )
+            for endpoint in endpoints:
+                self.stdout.write(f'  {endpoint.report()}')
@@ -16,3 +16,29 @@ class BaseModelMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+class CounterFieldsMixin(models.Model):
+    """Модель с денормализованными счетчиками `counter_fields`. Счетчики
+    меняются только атомарно через `change_counter`, поэтому при сохранении
+    существующего объекта целиком они не записываются, чтобы не затереть
+    значения, измененные с момента загрузки объекта."""
+    counter_fields: tuple[str, ...] = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
@@ -1,8 +1,119 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from foodgram_backend import constants
 
+from .counts import cached_count, estimate_count
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор Django с кешированием количества записей. Для больших
+    таблиц без фильтров количество оценивается по статистике Postgres."""
+    count_is_approximate = False
+
+    @cached_property
+    def count(self) -> int:
+        """Количество записей"""
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        estimate = estimate_count(self.object_list)
+        if estimate is not None:
+            self.count_is_approximate = True
+            return estimate
+        return cached_count(self.object_list)
+
+
+class FoodgramCursorPaginator(CursorPagination):
+    """Пагинация по курсору (keyset). Не выполняет `COUNT(*)` и не
+    использует `OFFSET`, поэтому скорость не зависит от глубины страницы."""
+    page_size_query_param = 'limit'
+    page_size = constants.DEFAULT_PAGINATION_PAGE_SIZE
+    ordering = ('-created', 'id')
+
 
 class FoodgramPaginator(PageNumberPagination):
+    """Постраничная пагинация `page`/`limit`. При `?pagination=cursor` или
+    переданном курсоре переключается на пагинацию по курсору с порядком
+    `cursor_ordering` (атрибут вьюсета или пагинатора). Запросы с
+    полнотекстовым поиском всегда постраничные: порядок курсора заменил
+    бы сортировку по релевантности.
+    Количество записей кешируется, а для больших таблиц без фильтров
+    оценивается, о чем сообщает поле ответа `count_is_approximate`."""
+    django_paginator_class = CachedCountPaginator
     page_size_query_param = 'limit'
     page_size = constants.DEFAULT_PAGINATION_PAGE_SIZE
+    pagination_mode_query_param = 'pagination'
+    cursor_paginator_class = FoodgramCursorPaginator
+    cursor_paginator = None
+    # Параметры, при которых результаты упорядочены по релевантности.
+    ranked_query_params = ('search',)
+
+    def use_cursor(self, request: Request) -> bool:
+        """Запрошена ли пагинация по курсору"""
+        if any(
+            request.query_params.get(param)
+            for param in self.ranked_query_params
+        ):
+            return False
+        return (
+            request.query_params.get(self.pagination_mode_query_param)
+            == 'cursor'
+            or self.cursor_paginator_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(
+            self, queryset: QuerySet, request: Request, view=None
+    ) -> list | None:
+        """Возвращает страницу в режиме, выбранном параметром запроса"""
+        if not self.use_cursor(request):
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_paginator_class()
+        ordering = getattr(view or self, 'cursor_ordering', None)
+        if ordering:
+            self.cursor_paginator.ordering = ordering
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data: list) -> Response:
+        """Ответ со страницей в формате выбранного режима пагинации"""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        response = super().get_paginated_response(data)
+        response.data['count_is_approximate'] = (
+            self.page.paginator.count_is_approximate
+        )
+        return response
+
+
+async def apaginate(
+        queryset: QuerySet, request: Request
+) -> FoodgramPaginator | None:
+    """Асинхронная постраничная пагинация для ASGI обработчиков. Страница
+    выбирается асинхронным ORM, количество записей считается с
+    кешированием в потоке. Возвращает пагинатор с выбранной страницей для
+    `get_paginated_response` или None для пагинации по курсору и
+    несуществующей страницы - их обрабатывает синхронный вьюсет."""
+    paginator = FoodgramPaginator()
+    if paginator.use_cursor(request):
+        return None
+    django_paginator = paginator.django_paginator_class(
+        queryset, paginator.get_page_size(request)
+    )
+    try:
+        page = await sync_to_async(django_paginator.page)(
+            paginator.get_page_number(request, django_paginator)
+        )
+    except InvalidPage:
+        return None
+    page.object_list = [obj async for obj in page.object_list]
+    paginator.page, paginator.request = page, request
+    return paginator
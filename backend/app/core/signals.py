@@ -0,0 +1,46 @@
+from typing import Type
+
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .connections import stats
+from .counts import invalidate_counts
+
+
+def table_changed(sender, **kwargs):
+    """Сбрасывает кеш количества записей при изменении таблицы"""
+    invalidate_counts(sender)
+
+
+def m2m_table_changed(sender, action: str, **kwargs):
+    """Сбрасывает кеш количества записей при изменении связи m2m.
+    `sender` - промежуточная модель связи."""
+    if action.startswith('post_'):
+        invalidate_counts(sender)
+
+
+def track_counts(*models: Type[Model]) -> None:
+    """Подключает сброс кеша количества записей к изменениям таблиц
+    `models`. Подключать только таблицы, которые читают запросы с
+    `cached_count`: обработчик `post_delete` отключает быстрое каскадное
+    удаление модели. Изменения через `bulk_create` и `update` нужно
+    сбрасывать явно `invalidate_counts`."""
+    for model in models:
+        post_save.connect(table_changed, sender=model)
+        post_delete.connect(table_changed, sender=model)
+        m2m_changed.connect(m2m_table_changed, sender=model)
+
+
+@receiver(connection_created)
+def database_connection_opened(sender, connection, **kwargs):
+    """Учитывает открытие нового соединения с базой данных"""
+    stats[f'opened:{connection.alias}'] += 1
+
+
+@receiver(request_finished)
+def request_served(sender, **kwargs):
+    """Учитывает обработанный запрос для статистики соединений"""
+    stats['requests'] += 1
@@ -0,0 +1,43 @@
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+
+from app.ingredients.models import Ingredient
+from app.recipes.models import IngredientsRecipes, Recipe
+from app.tags.models import Tag
+
+User = get_user_model()
+
+
+def create_user(username: str) -> User:
+    """Пользователь для тестов"""
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='pass',
+        first_name=username,
+        last_name=username,
+    )
+
+
+def create_recipe(
+        author: User,
+        name: str = 'Рецепт',
+        tags: Iterable[Tag] = (),
+        ingredients: Iterable[tuple[Ingredient, int]] = (),
+) -> Recipe:
+    """Рецепт для тестов с тегами и ингредиентами. Файл изображения не
+    создается, поле хранит только имя."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text=f'{name}: описание',
+        cooking_time=10,
+        image='recipes/images/test.png',
+    )
+    recipe.tags.set(tags)
+    for ingredient, amount in ingredients:
+        IngredientsRecipes.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
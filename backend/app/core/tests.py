@@ -0,0 +1,203 @@
+from importlib import import_module, reload
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+from django.urls import clear_url_caches
+
+from rest_framework.authtoken.models import Token
+
+from app.ingredients import search
+from app.ingredients.models import Ingredient, MeasurementUnit
+from app.ingredients.views import IngredientViewSet
+from app.recipes.models import FeedItem, Recipe, RecipesTags
+from app.recipes.views import RecipeViewSet
+from app.tags import registry
+from app.tags.models import Tag
+from app.tags.views import TagViewSet
+from app.users.models import Sub
+from app.users.views import Subscriptions
+
+from .counts import cached_count
+from .testing import create_recipe, create_user
+
+# Модули урлов, которые подключают асинхронные вьюхи чтения при импорте.
+URL_MODULES = (
+    'app.users.urls',
+    'app.tags.urls',
+    'app.ingredients.urls',
+    'app.recipes.urls',
+    'foodgram_backend.urls',
+)
+
+
+def reload_urls() -> None:
+    """Перестраивает урлы по текущему значению `ASYNC_READ_VIEWS`"""
+    for name in URL_MODULES:
+        reload(import_module(name))
+    clear_url_caches()
+
+
+def sync_fallback_forbidden(viewset, method: str):
+    """Запрещает обработку запроса синхронным вьюсетом: ответ должен
+    сформировать асинхронный обработчик"""
+    return mock.patch.object(
+        viewset, method, side_effect=AssertionError('синхронный вьюсет')
+    )
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class AsyncReadViewsTests(TestCase):
+    """Асинхронные вьюхи чтения в режиме ASGI"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Очистка класса выполняется после отмены `override_settings`,
+        # который регистрирует свою очистку в `super().setUpClass()`.
+        cls.addClassCleanup(reload_urls)
+        super().setUpClass()
+        reload_urls()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.reader = create_user('reader')
+        cls.token = Token.objects.create(user=cls.reader)
+        cls.tag = Tag.objects.create(name='Завтрак', color='#ffffff')
+        cls.ingredient = Ingredient.objects.create(
+            name='соль',
+            measurement_unit=MeasurementUnit.objects.create(
+                measurement_unit='г'
+            ),
+        )
+        cls.recipe = create_recipe(
+            cls.author, tags=[cls.tag], ingredients=[(cls.ingredient, 5)]
+        )
+        Sub.objects.create(user=cls.reader, subscription=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        # Справочники в памяти процесса еще не загружены, как в только что
+        # запущенном воркере.
+        registry._registry = None
+        search._index = None
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+
+    async def test_recipe_detail_with_cold_tag_registry(self):
+        """Рецепт отдается, когда справочник тегов нужно загрузить"""
+        with sync_fallback_forbidden(RecipeViewSet, 'retrieve'):
+            for headers in ({}, self.headers):
+                registry._registry = None
+                response = await self.async_client.get(
+                    f'/api/recipes/{self.recipe.pk}/', headers=headers
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [tag['slug'] for tag in response.json()['tags']],
+                    [self.tag.slug],
+                )
+
+    async def test_recipe_list_with_cold_tag_registry(self):
+        """Список рецептов отдается, когда справочник тегов нужно
+        загрузить"""
+        with sync_fallback_forbidden(RecipeViewSet, 'list'):
+            for headers in ({}, self.headers):
+                registry._registry = None
+                response = await self.async_client.get(
+                    '/api/recipes/', headers=headers
+                )
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                self.assertEqual(data['count'], 1)
+                self.assertEqual(
+                    data['results'][0]['tags'][0]['slug'], self.tag.slug
+                )
+
+    async def test_recipe_marks_for_user(self):
+        """Признаки избранного и корзины считаются для пользователя"""
+        with sync_fallback_forbidden(RecipeViewSet, 'retrieve'):
+            response = await self.async_client.get(
+                f'/api/recipes/{self.recipe.pk}/', headers=self.headers
+            )
+        data = response.json()
+        self.assertIs(data['is_favorited'], False)
+        self.assertIs(data['is_in_shopping_cart'], False)
+        self.assertIs(data['author']['is_subscribed'], True)
+
+    async def test_tags(self):
+        """Список тегов и тег из справочника в памяти"""
+        with sync_fallback_forbidden(TagViewSet, 'list'):
+            response = await self.async_client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['id'], self.tag.pk)
+        with sync_fallback_forbidden(TagViewSet, 'retrieve'):
+            response = await self.async_client.get(
+                f'/api/tags/{self.tag.pk}/'
+            )
+        self.assertEqual(response.json()['slug'], self.tag.slug)
+        response = await self.async_client.get(
+            '/api/tags/', headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_ingredients(self):
+        """Поиск ингредиентов по индексу в памяти"""
+        with sync_fallback_forbidden(IngredientViewSet, 'list'):
+            response = await self.async_client.get(
+                '/api/ingredients/', {'name': 'со'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [{'id': self.ingredient.pk, 'name': 'соль',
+              'measurement_unit': 'г'}],
+        )
+
+    async def test_subscriptions(self):
+        """Список подписок текущего пользователя"""
+        with sync_fallback_forbidden(Subscriptions, 'get'):
+            response = await self.async_client.get(
+                '/api/users/subscriptions/', headers=self.headers
+            )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['id'], self.author.pk)
+        self.assertEqual(data['results'][0]['recipes_count'], 1)
+
+    async def test_anonymous_subscriptions_fall_back_to_viewset(self):
+        """Ошибку аутентификации формирует синхронная вьюха"""
+        response = await self.async_client.get('/api/users/subscriptions/')
+        self.assertEqual(response.status_code, 401)
+
+
+class CachedCountTests(TestCase):
+    """Кеш количества записей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tag = Tag.objects.create(name='Обед', color='#000000')
+        cls.recipe = create_recipe(cls.author, tags=[cls.tag])
+        cls.other = create_recipe(cls.author, name='Другой')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_subquery_table_change_resets_count(self):
+        """Изменение таблицы подзапроса фильтра сбрасывает кеш"""
+        tagged = Recipe.objects.filter(
+            id__in=RecipesTags.objects.filter(tags=self.tag).values(
+                'recipe_id'
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(cached_count(tagged), 1)
+            self.other.tags.add(self.tag)
+        self.assertEqual(cached_count(tagged), 2)
+
+    def test_untracked_tables_keep_fast_delete(self):
+        """Таблицы без подсчета не получают обработчиков удаления"""
+        self.assertFalse(post_delete.has_listeners(FeedItem))
+        self.assertTrue(post_delete.has_listeners(RecipesTags))
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class IngredientsConfig(AppConfig):
+    name = 'app.ingredients'
+
+    def ready(self):
+        from . import signals  # noqa: F401
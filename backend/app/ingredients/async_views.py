@@ -0,0 +1,35 @@
+from django.http import HttpRequest, HttpResponse
+
+from asgiref.sync import sync_to_async
+
+from app.core.async_views import catalog_response
+from app.core.catalog import INGREDIENTS
+
+from .models import Ingredient
+from .search import get_ingredient_index
+from .serializers import IngredientSerializer
+from .views import IngredientViewSet
+
+
+async def ingredient_list(request: HttpRequest) -> HttpResponse | None:
+    """Асинхронный поиск ингредиентов по индексу в памяти процесса"""
+    name = request.GET.get('name', '')
+    return await catalog_response(
+        request,
+        INGREDIENTS,
+        sync_to_async(lambda: get_ingredient_index().search(name)),
+    )
+
+
+async def ingredient_detail(
+        request: HttpRequest, pk: str
+) -> HttpResponse | None:
+    """Асинхронный ингредиент"""
+    async def get_data() -> dict | None:
+        try:
+            ingredient = await IngredientViewSet.queryset.aget(pk=pk)
+        except (Ingredient.DoesNotExist, ValueError):
+            return None
+        return IngredientSerializer(ingredient).data
+
+    return await catalog_response(request, INGREDIENTS, get_data)
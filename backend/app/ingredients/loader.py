@@ -0,0 +1,129 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from django.db import transaction
+
+from app.core.catalog import INGREDIENTS, bump_catalog_version
+from app.core.counts import invalidate_counts
+from foodgram_backend import constants
+
+from .models import Ingredient, MeasurementUnit
+
+# Строка справочника: название ингредиента и единица измерения.
+IngredientRow = tuple[str, str]
+
+
+def iter_json_array(file: IO[str]) -> Iterator[dict]:
+    """Читает элементы json массива верхнего уровня по одному, не загружая
+    файл в память целиком"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = eof = False
+    while True:
+        # Пропускаем пробелы, запятые и начало массива между элементами.
+        while position < len(buffer) and (
+            buffer[position].isspace() or buffer[position] in ',['
+        ):
+            if buffer[position] == '[':
+                started = True
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        if position < len(buffer) and started:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                continue
+        if eof:
+            raise ValueError('Файл не содержит json массив')
+        chunk = file.read(constants.INGREDIENTS_READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def read_ingredients(path: str) -> Iterator[IngredientRow]:
+    """Читает ингредиенты из json (`[{"name", "measurement_unit"}]`) или
+    csv (`название,единица измерения`) файла построчно"""
+    with open(path, encoding='utf-8', newline='') as file:
+        if Path(path).suffix.lower() == '.csv':
+            rows = (row for row in csv.reader(file) if row)
+        else:
+            rows = (
+                (item['name'], item['measurement_unit'])
+                for item in iter_json_array(file)
+            )
+        for name, measurement_unit in rows:
+            name, measurement_unit = name.strip(), measurement_unit.strip()
+            if name and measurement_unit:
+                yield name, measurement_unit
+
+
+class IngredientLoader:
+    """Загрузка справочника ингредиентов пакетами. Единицы измерения
+    сопоставляются по словарю в памяти, новые создаются по мере появления.
+    Существующие ингредиенты не изменяются, поэтому повторная загрузка
+    того же файла ничего не меняет."""
+
+    def __init__(self):
+        self.unit_ids = dict(MeasurementUnit.objects.values_list(
+            'measurement_unit', 'id'
+        ))
+        self.counts = {'inserted': 0, 'unchanged': 0, 'units_inserted': 0}
+
+    def resolve_units(self, units: set[str]) -> None:
+        """Создает отсутствующие единицы измерения и добавляет их в
+        словарь"""
+        missing = units - self.unit_ids.keys()
+        if not missing:
+            return
+        MeasurementUnit.objects.bulk_create(
+            [MeasurementUnit(measurement_unit=unit) for unit in missing],
+            ignore_conflicts=True,
+        )
+        self.unit_ids.update(MeasurementUnit.objects.filter(
+            measurement_unit__in=missing
+        ).values_list('measurement_unit', 'id'))
+        self.counts['units_inserted'] += len(missing)
+
+    def load_batch(self, rows: list[IngredientRow]) -> None:
+        """Добавляет ингредиенты пакета, которых еще нет в базе данных"""
+        self.resolve_units({unit for _, unit in rows})
+        pairs = {(name, self.unit_ids[unit]) for name, unit in rows}
+        existing = set(Ingredient.objects.filter(
+            name__in={name for name, _ in pairs},
+            measurement_unit_id__in={unit_id for _, unit_id in pairs},
+        ).values_list('name', 'measurement_unit_id'))
+        new = pairs - existing
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(name=name, measurement_unit_id=unit_id)
+                for name, unit_id in new
+            ],
+            ignore_conflicts=True,
+        )
+        self.counts['inserted'] += len(new)
+        self.counts['unchanged'] += len(rows) - len(new)
+
+    @transaction.atomic
+    def load(self, rows: Iterable[IngredientRow]) -> dict[str, int]:
+        """Загружает все строки и возвращает количество добавленных и
+        неизмененных ингредиентов и добавленных единиц измерения"""
+        rows = iter(rows)
+        while batch := list(
+            islice(rows, constants.INGREDIENTS_LOAD_BATCH_SIZE)
+        ):
+            self.load_batch(batch)
+        if self.counts['inserted'] or self.counts['units_inserted']:
+            # bulk_create не отправляет сигналы.
+            invalidate_counts(Ingredient, MeasurementUnit)
+            bump_catalog_version(INGREDIENTS)
+        return self.counts
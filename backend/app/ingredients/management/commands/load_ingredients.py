@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from app.ingredients.loader import IngredientLoader, read_ingredients
+
+
+class Command(BaseCommand):
+    """Команда загрузки справочника ингредиентов из json или csv файла"""
+    help = "load ingredients from json or csv file, skipping existing ones"
+
+    def add_arguments(self, parser):
+        """Извлекаем аргументы из строки команды"""
+        parser.add_argument(
+            'path',
+            type=str,
+            help='json файл `[{"name", "measurement_unit"}]` или csv файл '
+                 '`название,единица измерения`',
+        )
+
+    def handle(self, *args, **options):
+        """Сохраняем в модель данные из файла"""
+        counts = IngredientLoader().load(read_ingredients(options['path']))
+        self.stdout.write(
+            f'Импорт прошел успешно: добавлено {counts["inserted"]} '
+            f'ингредиентов и {counts["units_inserted"]} единиц измерения, '
+            f'без изменений {counts["unchanged"]} ингредиентов'
+        )
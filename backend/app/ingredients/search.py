@@ -0,0 +1,85 @@
+from bisect import bisect_left
+
+from app.core.catalog import INGREDIENTS, get_catalog_version
+from foodgram_backend.db_router import use_primary
+
+from .models import Ingredient
+
+NGRAM_SIZE = 3
+
+
+def normalize(value: str) -> str:
+    """Приводит название к виду для поиска"""
+    return value.casefold().replace('ё', 'е').strip()
+
+
+def ngrams(value: str) -> set[str]:
+    """N-граммы строки"""
+    return {
+        value[i:i + NGRAM_SIZE]
+        for i in range(len(value) - NGRAM_SIZE + 1)
+    }
+
+
+class IngredientIndex:
+    """Индекс справочника ингредиентов в памяти процесса. Хранит
+    сериализованные ингредиенты, отсортированный список нормализованных
+    названий для поиска по префиксу и n-граммы для поиска по подстроке."""
+
+    def __init__(self, ingredients: list[dict]):
+        self.ingredients = ingredients
+        self.by_name = sorted(
+            ingredients, key=lambda item: normalize(item['name'])
+        )
+        self.names = [normalize(item['name']) for item in self.by_name]
+        self.ngrams: dict[str, set[int]] = {}
+        for position, name in enumerate(self.names):
+            for ngram in ngrams(name):
+                self.ngrams.setdefault(ngram, set()).add(position)
+
+    @classmethod
+    def from_db(cls) -> 'IngredientIndex':
+        """Строит индекс по данным из базы данных"""
+        return cls([
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit__measurement_unit'
+            ).order_by('id')
+        ])
+
+    def search(self, query: str) -> list[dict]:
+        """Ингредиенты, название которых начинается с `query`, затем
+        ингредиенты, название которых содержит `query`. Без запроса
+        возвращает весь справочник."""
+        query = normalize(query)
+        if not query:
+            return self.ingredients
+        start = bisect_left(self.names, query)
+        end = bisect_left(self.names, query + '\U0010ffff')
+        if len(query) < NGRAM_SIZE:
+            candidates = range(len(self.names))
+        else:
+            candidates = sorted(set.intersection(*(
+                self.ngrams.get(ngram, set()) for ngram in ngrams(query)
+            )))
+        return self.by_name[start:end] + [
+            self.by_name[position] for position in candidates
+            if not start <= position < end
+            and query in self.names[position]
+        ]
+
+
+_index: IngredientIndex | None = None
+_index_version: float | None = None
+
+
+def get_ingredient_index() -> IngredientIndex:
+    """Индекс ингредиентов текущего процесса. Перестраивается по основной
+    базе данных, если справочник изменился после построения индекса."""
+    global _index, _index_version
+    version = get_catalog_version(INGREDIENTS)
+    if _index is None or _index_version != version:
+        with use_primary():
+            _index = IngredientIndex.from_db()
+        _index_version = version
+    return _index
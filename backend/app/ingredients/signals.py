@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app.core.catalog import INGREDIENTS, bump_catalog_version
+
+from .models import Ingredient, MeasurementUnit
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=MeasurementUnit)
+@receiver(post_delete, sender=MeasurementUnit)
+def ingredients_changed(sender, **kwargs):
+    """Обновляет версию справочника ингредиентов"""
+    bump_catalog_version(INGREDIENTS)
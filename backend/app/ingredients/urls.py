@@ -2,9 +2,15 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from app.core.async_views import with_async_reads
+
+from .async_views import ingredient_detail, ingredient_list
 from .views import IngredientViewSet
 
 router = DefaultRouter()
 router.register('ingredients', IngredientViewSet, basename='Ingredients')
 
-urlpatterns = [path('', include(router.urls))]
+urlpatterns = [path('', include(with_async_reads(router.urls, {
+    'Ingredients-list': ingredient_list,
+    'Ingredients-detail': ingredient_detail,
+})))]
@@ -1,9 +1,15 @@
+from typing import Any
+
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from .filters import IngredientsSearchFilter
+from app.core.catalog import INGREDIENTS, catalog_condition
+
 from .models import Ingredient
+from .search import get_ingredient_index
 from .serializers import IngredientSerializer
 
 
@@ -11,7 +17,20 @@ class IngredientViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
     """Вьюсет ингредиентов"""
     permission_classes = [AllowAny]
     serializer_class = IngredientSerializer
-    queryset = Ingredient.objects.all()
+    queryset = Ingredient.objects.all().select_related('measurement_unit')
     pagination_class = None
-    search_fields = ['^name']
-    filter_backends = [IngredientsSearchFilter]
+
+    @catalog_condition(INGREDIENTS)
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any):
+        """Ингредиент. Поддерживает условные запросы."""
+        return super().retrieve(request, *args, **kwargs)
+
+    @catalog_condition(INGREDIENTS)
+    def list(self, request: Request, *args: Any, **kwargs: Any):
+        """Список ингредиентов с поиском по названию (`?name=`) из индекса
+        в памяти процесса: сначала совпадения по началу названия, затем
+        по подстроке. Запросов к базе данных нет, пока справочник не
+        изменился. Поддерживает условные запросы."""
+        return Response(
+            get_ingredient_index().search(request.query_params.get('name', ''))
+        )
@@ -1,9 +1,10 @@
 from django.contrib import admin
+from django.core.files.storage import default_storage
 from django.utils.safestring import mark_safe
 
-from sorl.thumbnail import get_thumbnail
-
 from .models import IngredientsRecipes, Recipe, RecipesTags
+from .search import search_recipes
+from .shopping_list import rebuild_recipe_shopping_lists
 
 
 class RecipesTagsInline(admin.TabularInline):
@@ -22,34 +23,47 @@ class RecipeAdmin(admin.ModelAdmin):
     """Настройка отображения рецептов в админ панели"""
     list_filter = ('name', 'author', 'tags')
     search_fields = ('name', 'text')
-    readonly_fields = ('favorites_count', 'preview')
+    readonly_fields = ('favorites_count', 'shopping_cart_count', 'preview')
     list_display = (
         'name', 'author', 'author_name', 'preview_small', 'favorites_count'
     )
     list_display_links = ('name', 'preview_small')
     inlines = (IngredientsRecipesInline, RecipesTagsInline)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по названию и описанию через полнотекстовый индекс"""
+        if not search_term:
+            return queryset, False
+        return search_recipes(queryset, search_term), False
+
+    def save_related(self, request, form, formsets, change):
+        """После изменения ингредиентов пересчитывает списки покупок
+        пользователей, у которых рецепт в корзине"""
+        super().save_related(request, form, formsets, change)
+        if change:
+            rebuild_recipe_shopping_lists(form.instance.id)
+
     @staticmethod
-    def preview(obj: Recipe):
-        """Генерирует превью изображения рецепта в окне редактирования
-        рецепта"""
+    def variant_url(obj: Recipe, variant: str) -> str:
+        """Ссылка на вариант изображения рецепта. Пока варианты не
+        сформированы воркером, используется исходное изображение."""
+        name = obj.current_image_variants.get(variant, {}).get('webp')
+        return default_storage.url(name) if name else obj.image.url
+
+    @classmethod
+    def preview(cls, obj: Recipe):
+        """Превью изображения рецепта в окне редактирования рецепта"""
+        if not obj.image:
+            return ''
         return mark_safe(
-            f'<img src="'
-            f'{get_thumbnail(obj.image.path, "450", upscale=False).url}">'
+            f'<img src="{cls.variant_url(obj, "card")}" width="450">'
         )
 
-    @staticmethod
-    def preview_small(obj: Recipe):
-        """Генерирует превью изображения рецепта в окне списка рецептов"""
-        thumbnail_url = get_thumbnail(
-            obj.image.path,
-            "100x100",
-            crop="center",
-            upscale=False
-        ).url
+    @classmethod
+    def preview_small(cls, obj: Recipe):
+        """Превью изображения рецепта в окне списка рецептов"""
         return mark_safe(
-            f'<img src="'
-            f'{thumbnail_url}">'
+            f'<img src="{cls.variant_url(obj, "thumbnail")}" width="100">'
         )
 
     @staticmethod
@@ -57,10 +71,5 @@ class RecipeAdmin(admin.ModelAdmin):
         """Генерирует полное имя автора рецепта"""
         return f'{obj.author.first_name} {obj.author.last_name}'
 
-    @staticmethod
-    def favorites_count(obj: Recipe):
-        """Создает счетчик добавления рецепта в избранное"""
-        return obj.favorites.count()
-
 
 admin.site.register(Recipe, RecipeAdmin)
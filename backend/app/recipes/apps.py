@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class RecipesConfig(AppConfig):
+    name = 'app.recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,129 @@
+from typing import Awaitable, Callable, Iterable
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.exceptions import ValidationError
+from django.http import HttpRequest, HttpResponse
+
+from asgiref.sync import sync_to_async
+from rest_framework.request import Request
+
+from app.core.async_views import drf_request, json_response
+from app.core.pagination import apaginate
+from app.tags.registry import get_tag_registry
+from app.users.serializers import aload_subscription_ids
+from foodgram_backend.db_router import use_primary
+
+from .cache import (
+    aget_user_recipe_ids,
+    detail_cache_key,
+    get_cached_response,
+    list_cache_key,
+    set_cached_response
+)
+from .filters import RecipeFilterSet
+from .models import Favorite, Recipe, ShoppingCart
+from .serializers import RecipeReadSerializer
+from .views import RecipeViewSet
+
+
+async def amark_user_recipes(
+        recipes: Iterable[Recipe], user: AbstractBaseUser
+) -> None:
+    """Асинхронный вариант `RecipeViewSet.mark_user_recipes`"""
+    favorites = shopping_cart = set()
+    if user.is_authenticated:
+        favorites = await aget_user_recipe_ids(Favorite, user.pk)
+        shopping_cart = await aget_user_recipe_ids(ShoppingCart, user.pk)
+    for recipe in recipes:
+        recipe.is_favorited = recipe.pk in favorites
+        recipe.is_in_shopping_cart = recipe.pk in shopping_cart
+
+
+async def aserializer_context(request: Request) -> dict:
+    """Контекст `RecipeReadSerializer` с загруженным справочником тегов:
+    при устаревшем справочнике он перечитывается из базы данных, что
+    нельзя делать в цикле событий"""
+    return {
+        'request': request,
+        'tag_registry': await sync_to_async(get_tag_registry)(),
+    }
+
+
+async def cached_response(
+        request: Request,
+        get_key: Callable[[], str],
+        render: Callable[[], Awaitable[dict | None]],
+) -> HttpResponse | None:
+    """Асинхронный вариант `RecipeViewSet.cached_response`: ответ
+    анонимному пользователю отдается из кеша и сохраняется в кеш"""
+    if request.user.is_authenticated:
+        data = await render()
+        return None if data is None else json_response(data)
+    key = await sync_to_async(get_key)()
+    if (content := await sync_to_async(get_cached_response)(key)) is not None:
+        return json_response(content=content)
+    # Как и в синхронном вьюсете, общий кеш заполняется с основной базы
+    # данных.
+    with use_primary():
+        data = await render()
+    if data is None:
+        return None
+    response = json_response(data)
+    await sync_to_async(set_cached_response)(key, response.content)
+    return response
+
+
+async def render_recipe_page(request: Request) -> dict | None:
+    """Страница списка рецептов с фильтрами вьюсета"""
+    filterset = RecipeFilterSet(
+        request.query_params,
+        queryset=RecipeViewSet().get_queryset(),
+        request=request,
+    )
+    # Проверка фильтров может обращаться к базе данных (автор).
+    if not await sync_to_async(filterset.is_valid)():
+        return None
+    paginator = await apaginate(
+        await sync_to_async(lambda: filterset.qs)(), request
+    )
+    if paginator is None:
+        return None
+    await amark_user_recipes(paginator.page, request.user)
+    await aload_subscription_ids(request)
+    serializer = RecipeReadSerializer(
+        paginator.page, many=True, context=await aserializer_context(request)
+    )
+    return paginator.get_paginated_response(serializer.data).data
+
+
+async def render_recipe(request: Request, pk: str) -> dict | None:
+    """Рецепт"""
+    try:
+        recipe = await RecipeViewSet().get_queryset().aget(pk=pk)
+    except (Recipe.DoesNotExist, ValueError, ValidationError):
+        return None
+    await amark_user_recipes([recipe], request.user)
+    await aload_subscription_ids(request)
+    return RecipeReadSerializer(
+        recipe, context=await aserializer_context(request)
+    ).data
+
+
+async def recipe_list(request: HttpRequest) -> HttpResponse | None:
+    """Асинхронный список рецептов"""
+    wrapped = drf_request(request)
+    return await cached_response(
+        wrapped,
+        lambda: list_cache_key(wrapped),
+        lambda: render_recipe_page(wrapped),
+    )
+
+
+async def recipe_detail(request: HttpRequest, pk: str) -> HttpResponse | None:
+    """Асинхронный рецепт"""
+    wrapped = drf_request(request)
+    return await cached_response(
+        wrapped,
+        lambda: detail_cache_key(pk),
+        lambda: render_recipe(wrapped, pk),
+    )
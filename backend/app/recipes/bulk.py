@@ -0,0 +1,105 @@
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from app.core.counters import change_counter
+from app.core.counts import invalidate_counts
+from app.ingredients.models import Ingredient
+from foodgram_backend import constants
+
+from .cache import invalidate_recipes
+from .feed import fan_out_recipes
+from .models import IngredientsRecipes, Recipe, RecipesTags
+from .serializers import RecipeBulkItemSerializer
+
+User = get_user_model()
+
+
+def raw_ingredient_ids(items: list[Any]) -> set[int]:
+    """Id ингредиентов из непроверенных данных всех рецептов"""
+    ids = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        ingredients = item.get('ingredients')
+        if not isinstance(ingredients, list):
+            continue
+        for ingredient in ingredients:
+            if not isinstance(ingredient, dict):
+                continue
+            try:
+                ids.add(int(ingredient.get('id')))
+            except (TypeError, ValueError):
+                continue
+    return ids
+
+
+def bulk_create_recipes(items: list[Any], author: User) -> dict[str, list]:
+    """Массовое создание рецептов автора. Существующие ингредиенты всех
+    рецептов проверяются одним запросом, теги - по справочнику в памяти.
+    Рецепты без ошибок и их связи с тегами и ингредиентами сохраняются
+    пакетными INSERT в одной транзакции. Возвращает индексы и id созданных
+    рецептов и ошибки валидации остальных."""
+    context = {
+        'ingredient_ids': set(Ingredient.objects.filter(
+            id__in=raw_ingredient_ids(items)
+        ).values_list('id', flat=True)),
+    }
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        serializer = RecipeBulkItemSerializer(data=item, context=context)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+    if not valid:
+        return {'created': [], 'errors': errors}
+
+    recipes = [
+        Recipe(
+            author=author,
+            name=data['name'],
+            text=data['text'],
+            image=data['image'],
+            cooking_time=data['cooking_time'],
+        )
+        for _, data in valid
+    ]
+    with transaction.atomic():
+        Recipe.objects.bulk_create(
+            recipes, batch_size=constants.RECIPES_BULK_BATCH_SIZE
+        )
+        RecipesTags.objects.bulk_create(
+            [
+                RecipesTags(recipe=recipe, tags=tag)
+                for recipe, (_, data) in zip(recipes, valid)
+                for tag in data['tags']
+            ],
+            batch_size=constants.RECIPES_BULK_BATCH_SIZE,
+        )
+        IngredientsRecipes.objects.bulk_create(
+            [
+                IngredientsRecipes(
+                    recipe=recipe,
+                    ingredient_id=ingredient['id'],
+                    amount=ingredient['amount'],
+                )
+                for recipe, (_, data) in zip(recipes, valid)
+                for ingredient in data['ingredients']
+            ],
+            batch_size=constants.RECIPES_BULK_BATCH_SIZE,
+        )
+        # bulk_create не отправляет сигналы, кеши и счетчики обновляются
+        # явно.
+        invalidate_counts(Recipe, RecipesTags, IngredientsRecipes)
+        change_counter(User, 'recipes_count', [author.id], len(recipes))
+        fan_out_recipes(recipes)
+        invalidate_recipes(recipe.id for recipe in recipes)
+    return {
+        'created': [
+            {'index': index, 'id': recipe.id}
+            for recipe, (index, _) in zip(recipes, valid)
+        ],
+        'errors': errors,
+    }
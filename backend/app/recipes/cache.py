@@ -0,0 +1,148 @@
+import time
+from typing import Iterable, Type
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
+
+from rest_framework.request import Request
+
+from foodgram_backend import constants
+from foodgram_backend.db_router import use_primary
+
+LIST_VERSION_KEY = 'recipes:list-version'
+DETAIL_VERSION_KEY = 'recipes:detail-version'
+
+# Параметры запроса, от которых зависит ответ для анонимного пользователя.
+# Фильтры по избранному и корзине для анонима ни на что не влияют.
+LIST_CACHE_PARAMS = (
+    'page', 'limit', 'pagination', 'cursor', 'author', 'tags', 'search'
+)
+
+
+def get_version(key: str) -> int:
+    """Возвращает текущую версию пространства ключей кеша. Версия - время
+    ее создания в наносекундах, а не счетчик: если кеш вытеснит ключ
+    версии, новая версия не совпадет ни с одной из прежних, и старые
+    записи не станут снова доступны."""
+    return cache.get_or_set(key, time.time_ns(), timeout=None)
+
+
+def bump_version(key: str) -> None:
+    """Меняет версию пространства ключей кеша, делая все ключи предыдущей
+    версии недоступными"""
+    cache.set(key, time.time_ns(), timeout=None)
+
+
+def list_cache_key(request: Request) -> str:
+    """Ключ кеша страницы списка рецептов для анонимного пользователя"""
+    params = '&'.join(
+        f'{param}={",".join(sorted(request.query_params.getlist(param)))}'
+        for param in LIST_CACHE_PARAMS
+    )
+    return (
+        f'recipes:list:{get_version(LIST_VERSION_KEY)}:'
+        f'{request.get_host()}:{params}'
+    )
+
+
+def detail_cache_key(pk: int | str) -> str:
+    """Ключ кеша рецепта для анонимного пользователя"""
+    return f'recipes:detail:{get_version(DETAIL_VERSION_KEY)}:{pk}'
+
+
+def get_cached_response(key: str) -> bytes | None:
+    """Возвращает отрендеренный ответ из кеша"""
+    return cache.get(key)
+
+
+def set_cached_response(key: str, content: bytes) -> None:
+    """Сохраняет отрендеренный ответ в кеш"""
+    cache.set(key, content, constants.RECIPES_CACHE_TIMEOUT)
+
+
+def invalidate_recipes(recipe_ids: Iterable[int]) -> None:
+    """Сбрасывает кеш указанных рецептов и всех страниц списка рецептов
+    после фиксации текущей транзакции"""
+    keys = [detail_cache_key(pk) for pk in set(recipe_ids)]
+
+    def invalidate():
+        cache.delete_many(keys)
+        bump_version(LIST_VERSION_KEY)
+
+    transaction.on_commit(invalidate)
+
+
+def invalidate_all_recipes() -> None:
+    """Сбрасывает весь кеш рецептов после фиксации текущей транзакции"""
+    def invalidate():
+        bump_version(DETAIL_VERSION_KEY)
+        bump_version(LIST_VERSION_KEY)
+
+    transaction.on_commit(invalidate)
+
+
+def user_recipe_ids_version_key(model: Type[Model], user_id: int) -> str:
+    """Ключ версии кеша множества рецептов пользователя в избранном или
+    корзине"""
+    return f'recipes:{model._meta.model_name}-version:{user_id}'
+
+
+def user_recipe_ids_key(
+        model: Type[Model], user_id: int, version: int
+) -> str:
+    """Ключ кеша множества рецептов пользователя в избранном или корзине.
+    Версия читается до запроса к базе данных, поэтому чтение, начатое до
+    изменения, сохраняет старое множество под старой версией."""
+    return f'recipes:{model._meta.model_name}:{user_id}:{version}'
+
+
+def get_user_recipe_ids(model: Type[Model], user_id: int) -> set[int]:
+    """Возвращает множество id рецептов пользователя из модели связи
+    пользователь - рецепт (Favorite или ShoppingCart). Кеш заполняется
+    чтением с основной базы данных."""
+    key = user_recipe_ids_key(
+        model,
+        user_id,
+        get_version(user_recipe_ids_version_key(model, user_id)),
+    )
+    recipe_ids = cache.get(key)
+    if recipe_ids is None:
+        with use_primary():
+            recipe_ids = set(
+                model.objects.filter(user_id=user_id).values_list(
+                    'recipe_id', flat=True
+                )
+            )
+        cache.set(key, recipe_ids, constants.USER_RECIPES_CACHE_TIMEOUT)
+    return recipe_ids
+
+
+async def aget_user_recipe_ids(model: Type[Model], user_id: int) -> set[int]:
+    """Асинхронный вариант `get_user_recipe_ids`"""
+    version = await cache.aget_or_set(
+        user_recipe_ids_version_key(model, user_id),
+        time.time_ns,
+        timeout=None,
+    )
+    key = user_recipe_ids_key(model, user_id, version)
+    recipe_ids = await cache.aget(key)
+    if recipe_ids is None:
+        with use_primary():
+            recipe_ids = {
+                recipe_id async for recipe_id in model.objects.filter(
+                    user_id=user_id
+                ).values_list('recipe_id', flat=True)
+            }
+        await cache.aset(
+            key, recipe_ids, constants.USER_RECIPES_CACHE_TIMEOUT
+        )
+    return recipe_ids
+
+
+def invalidate_user_recipe_ids(model: Type[Model], user_id: int) -> None:
+    """Меняет версию кеша множества рецептов пользователя после фиксации
+    текущей транзакции"""
+    transaction.on_commit(
+        lambda: bump_version(user_recipe_ids_version_key(model, user_id))
+    )
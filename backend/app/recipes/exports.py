@@ -0,0 +1,129 @@
+import uuid
+from datetime import timedelta
+from hashlib import sha256
+from tempfile import TemporaryFile
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from orjson import dumps
+
+from foodgram_backend import constants
+
+from .models import ShoppingListExport
+from .pdf import ShoppingListPDF
+from .shopping_list import get_shopping_list
+
+Status = ShoppingListExport.Status
+
+
+def enqueue_shopping_list_export(user_id: int) -> ShoppingListExport:
+    """Ставит в очередь формирование pdf документа списка покупок.
+    Если документ с таким же содержимым уже сформирован, задание сразу
+    получает готовый файл. Повторный запрос с тем же содержимым, пока
+    задание в очереди, возвращает существующее задание: одновременные
+    запросы не создают дубликатов благодаря уникальному ограничению на
+    активные задания пользователя."""
+    items = [
+        list(item) for item in get_shopping_list(user_id).values_list(
+            'name', 'amount', 'measurement_unit'
+        )
+    ]
+    content_hash = sha256(dumps(items)).hexdigest()
+    queued = ShoppingListExport.objects.filter(
+        user_id=user_id,
+        content_hash=content_hash,
+        status__in=(Status.PENDING, Status.PROCESSING),
+    ).first()
+    if queued:
+        return queued
+    # Старые файлы не переиспользуются: их может удалить
+    # `delete_expired_exports`.
+    rendered = ShoppingListExport.objects.filter(
+        content_hash=content_hash,
+        status=Status.DONE,
+        modified__gte=timezone.now() - timedelta(
+            seconds=constants.EXPORT_TTL / 2
+        ),
+    ).exclude(file='').only('file').last()
+    try:
+        with transaction.atomic():
+            return ShoppingListExport.objects.create(
+                user_id=user_id,
+                content_hash=content_hash,
+                items=items,
+                status=Status.DONE if rendered else Status.PENDING,
+                file=rendered.file.name if rendered else '',
+            )
+    except IntegrityError:
+        # Такое же задание поставил в очередь параллельный запрос.
+        return ShoppingListExport.objects.filter(
+            user_id=user_id, content_hash=content_hash
+        ).last()
+
+
+def claim_export() -> ShoppingListExport | None:
+    """Забирает из очереди следующее задание. Задания, зависшие в статусе
+    "Формируется" дольше `EXPORT_PROCESSING_TIMEOUT`, выдаются повторно."""
+    stale = timezone.now() - timedelta(
+        seconds=constants.EXPORT_PROCESSING_TIMEOUT
+    )
+    with transaction.atomic():
+        job = ShoppingListExport.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            Q(status=Status.PENDING)
+            | Q(status=Status.PROCESSING, modified__lt=stale)
+        ).order_by('id').first()
+        if job is None:
+            return None
+        job.status = Status.PROCESSING
+        job.save(update_fields=['status', 'modified'])
+    return job
+
+
+def process_export(job: ShoppingListExport) -> None:
+    """Формирует pdf документ задания и отдает тот же файл всем заданиям
+    в очереди с таким же содержимым"""
+    try:
+        with TemporaryFile() as output:
+            ShoppingListPDF(output).render(job.items)
+            output.seek(0)
+            job.file.save(f'{uuid.uuid4()}.pdf', File(output), save=False)
+    except Exception as error:
+        job.status = Status.FAILED
+        job.error = str(error)
+        job.save(update_fields=['status', 'error', 'modified'])
+        raise
+    job.status = Status.DONE
+    job.save(update_fields=['status', 'file', 'modified'])
+    ShoppingListExport.objects.filter(
+        content_hash=job.content_hash,
+        status=Status.PENDING,
+    ).update(status=Status.DONE, file=job.file.name, modified=timezone.now())
+
+
+def delete_expired_exports() -> int:
+    """Удаляет готовые задания и задания с ошибкой старше `EXPORT_TTL`
+    и их файлы, если на файл не ссылаются оставшиеся задания. Возвращает
+    количество удаленных заданий."""
+    expired = ShoppingListExport.objects.filter(
+        status__in=(Status.DONE, Status.FAILED),
+        modified__lt=timezone.now() - timedelta(seconds=constants.EXPORT_TTL),
+    )
+    with transaction.atomic():
+        files = set(
+            expired.exclude(file='').values_list('file', flat=True)
+        )
+        deleted, _ = expired.delete()
+        files -= set(
+            ShoppingListExport.objects.filter(file__in=files).values_list(
+                'file', flat=True
+            )
+        )
+    storage = ShoppingListExport.file.field.storage
+    for name in files:
+        storage.delete(name)
+    return deleted
@@ -0,0 +1,68 @@
+from collections import defaultdict
+from itertools import islice
+from typing import Iterable
+
+from app.core.counts import invalidate_counts
+from app.users.models import Sub
+from foodgram_backend import constants
+
+from .models import FeedItem, Recipe
+
+
+def insert_feed_items(items: Iterable[FeedItem]) -> None:
+    """Сохраняет записи лент пакетами, уже существующие пропускаются"""
+    items = iter(items)
+    inserted = False
+    while batch := list(islice(items, constants.FEED_BATCH_SIZE)):
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+        inserted = True
+    if inserted:
+        invalidate_counts(FeedItem)
+
+
+def fan_out_recipes(recipes: Iterable[Recipe]) -> None:
+    """Добавляет опубликованные рецепты в ленты подписчиков их авторов"""
+    recipes_by_author = defaultdict(list)
+    for recipe in recipes:
+        recipes_by_author[recipe.author_id].append(recipe)
+    if not recipes_by_author:
+        return
+    followers = Sub.objects.filter(
+        subscription_id__in=recipes_by_author
+    ).values_list('subscription_id', 'user_id').order_by()
+    insert_feed_items(
+        FeedItem(
+            user_id=user_id,
+            recipe=recipe,
+            author_id=author_id,
+            published=recipe.created,
+        )
+        for author_id, user_id in followers.iterator()
+        for recipe in recipes_by_author[author_id]
+    )
+
+
+def backfill_feed(user_id: int, author_id: int) -> None:
+    """Добавляет в ленту пользователя последние рецепты автора, на
+    которого он подписался"""
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-created'
+    ).values_list('id', 'created')[:constants.FEED_BACKFILL_LIMIT]
+    insert_feed_items(
+        FeedItem(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            published=created,
+        )
+        for recipe_id, created in recipes
+    )
+
+
+def prune_feed(user_id: int, author_id: int) -> None:
+    """Удаляет из ленты пользователя рецепты автора, от которого он
+    отписался. На `FeedItem` нет обработчиков удаления и ссылок других
+    таблиц, поэтому Django удаляет записи одним DELETE по индексу
+    `feed_item_user_author`, не загружая их."""
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+    invalidate_counts(FeedItem)
@@ -0,0 +1,25 @@
+from django.core.files.storage import default_storage
+
+from rest_framework import serializers
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Ссылки на варианты изображения рецепта
+    `{вариант: {расширение: url}}`"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'current_image_variants')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value: dict) -> dict:
+        request = self.context.get('request')
+        return {
+            variant: {
+                extension: (
+                    request.build_absolute_uri(default_storage.url(name))
+                    if request else default_storage.url(name)
+                )
+                for extension, name in formats.items()
+            }
+            for variant, formats in value.items()
+        }
@@ -2,20 +2,23 @@ from django.db.models import QuerySet
 
 from django_filters import FilterSet, filters
 
-from app.tags.models import Tag
+from app.tags.registry import get_tag_registry
 
-from .models import Recipe
+from .cache import get_user_recipe_ids
+from .models import Favorite, Recipe, RecipesTags, ShoppingCart
+from .search import search_recipes
 
 
 class RecipeFilterSet(FilterSet):
     """Класс фильтра для вьюсета рецептов"""
 
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        to_field_name='slug',
-        field_name='tags__slug',
-
+    tags = filters.MultipleChoiceFilter(
+        choices=lambda: [
+            (slug, slug) for slug in get_tag_registry().id_by_slug
+        ],
+        method='tags_filter',
     )
+    search = filters.CharFilter(method='search_filter')
     is_favorited = filters.NumberFilter(method='is_favorited_filter')
     is_in_shopping_cart = filters.NumberFilter(
         method='is_in_shopping_cart_filter'
@@ -23,13 +26,29 @@ class RecipeFilterSet(FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'search', 'is_favorited', 'is_in_shopping_cart'
+        )
+
+    def tags_filter(self, queryset: QuerySet, name: str, value: list[str]):
+        """Фильтр по слагам тегов (любой из указанных). Слаги переводятся
+        в id по справочнику в памяти, таблица тегов в запросе не нужна."""
+        id_by_slug = get_tag_registry().id_by_slug
+        return queryset.filter(id__in=RecipesTags.objects.filter(
+            tags_id__in=[id_by_slug[slug] for slug in value]
+        ).values('recipe_id'))
+
+    def search_filter(self, queryset: QuerySet, name: str, value: str):
+        """Полнотекстовый поиск по названию и описанию"""
+        return search_recipes(queryset, value)
 
     def is_favorited_filter(self, queryset: QuerySet, name: str, value: int):
         """Фильтр по избранному"""
         user = self.request.user
         if user.is_authenticated and value:
-            return queryset.filter(favorite__user=user)
+            return queryset.filter(
+                id__in=get_user_recipe_ids(Favorite, user.pk)
+            )
         return queryset
 
     def is_in_shopping_cart_filter(
@@ -38,5 +57,7 @@ class RecipeFilterSet(FilterSet):
         """Фильтр по наличию в корзине покупок"""
         user = self.request.user
         if user.is_authenticated and value:
-            return queryset.filter(shoppingcart__user=user)
+            return queryset.filter(
+                id__in=get_user_recipe_ids(ShoppingCart, user.pk)
+            )
         return queryset
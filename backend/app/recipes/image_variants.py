@@ -0,0 +1,108 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+
+from PIL import Image, ImageOps
+
+from foodgram_backend import constants
+
+from .cache import invalidate_recipes
+from .models import Recipe
+
+# Варианты изображения: `{вариант: {расширение: имя файла}}`.
+ImageVariants = dict[str, dict[str, str]]
+
+
+def variant_name(source: str, variant: str, extension: str) -> str:
+    """Имя файла варианта изображения. Зависит только от имени исходного
+    изображения, поэтому повторная обработка перезаписывает те же файлы."""
+    stem = PurePosixPath(source).with_suffix('')
+    return (
+        f'{constants.IMAGE_VARIANTS_DIR}/{stem}_{variant}.{extension}'
+    )
+
+
+def to_rgb(image: Image.Image) -> Image.Image:
+    """Переводит изображение в RGB для JPEG, прозрачность заменяется
+    белым фоном"""
+    if image.mode == 'RGB':
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def render_image_variants(source: str) -> ImageVariants:
+    """Формирует все варианты изображения во всех форматах и сохраняет их
+    в хранилище медиафайлов. Выполняется в отдельном процессе воркера, к
+    базе данных не обращается."""
+    with default_storage.open(source) as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        variants = {}
+        for variant, (size, crop) in constants.IMAGE_VARIANTS.items():
+            if crop:
+                resized = ImageOps.fit(image, size)
+            else:
+                resized = image.copy()
+                resized.thumbnail(size)
+            variants[variant] = {}
+            for extension, image_format in (
+                constants.IMAGE_VARIANT_FORMATS.items()
+            ):
+                output = BytesIO()
+                (to_rgb(resized) if image_format == 'JPEG' else resized).save(
+                    output,
+                    image_format,
+                    quality=constants.IMAGE_VARIANT_QUALITY,
+                )
+                name = variant_name(source, variant, extension)
+                default_storage.delete(name)
+                variants[variant][extension] = default_storage.save(
+                    name, ContentFile(output.getvalue())
+                )
+    return variants
+
+
+def pending_image_variants(limit: int) -> list[tuple[int, str]]:
+    """Рецепты, варианты изображения которых не сформированы или
+    сформированы для предыдущего изображения"""
+    return list(
+        Recipe.objects.exclude(image_variants_source=F('image')).order_by(
+            'id'
+        ).values_list('id', 'image')[:limit]
+    )
+
+
+def variant_names(variants: ImageVariants) -> set[str]:
+    """Имена всех файлов вариантов изображения"""
+    return {
+        name for formats in variants.values() for name in formats.values()
+    }
+
+
+def save_image_variants(
+        recipe_id: int, source: str, variants: ImageVariants
+) -> None:
+    """Сохраняет варианты изображения рецепта, если изображение не
+    изменилось за время обработки. Файлы вариантов, которые больше не
+    используются, удаляются. Пустой `variants` (ошибка обработки) снимает
+    изображение с очереди."""
+    previous = Recipe.objects.filter(id=recipe_id).values_list(
+        'image_variants', flat=True
+    ).first() or {}
+    updated = Recipe.objects.filter(id=recipe_id, image=source).update(
+        image_variants=variants, image_variants_source=source
+    )
+    if updated:
+        invalidate_recipes([recipe_id])
+        unused = variant_names(previous) - variant_names(variants)
+    else:
+        unused = variant_names(variants)
+    for name in unused:
+        default_storage.delete(name)
@@ -0,0 +1,106 @@
+import binascii
+import re
+import uuid
+from base64 import b64decode
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+
+from PIL import Image, UnidentifiedImageError
+from rest_framework.exceptions import ValidationError
+
+from foodgram_backend import constants
+
+# Допустимые форматы изображений и расширения файлов для них.
+IMAGE_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+
+# Пробельные символы (переносы строк) внутри base64 строки.
+WHITESPACE = re.compile(r'\s')
+
+
+def decoded_size(data: str, offset: int = 0) -> int:
+    """Размер данных base64 строки (начиная с `offset`) после
+    декодирования"""
+    length = len(data) - offset
+    if length % 4:
+        raise ValidationError('Некорректный файл изображения')
+    return length // 4 * 3 - data[-2:].count('=')
+
+
+def decode_base64(data: str, offset: int = 0) -> SpooledTemporaryFile:
+    """Декодирует base64 строку (начиная с `offset`) частями во временный
+    файл, который переносится из памяти на диск после
+    `IMAGE_SPOOL_MAX_MEMORY_SIZE`. Размер проверяется до декодирования."""
+    if decoded_size(data, offset) > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            'Размер изображения не должен превышать '
+            f'{settings.IMAGE_UPLOAD_MAX_SIZE} байт'
+        )
+    output = SpooledTemporaryFile(
+        max_size=constants.IMAGE_SPOOL_MAX_MEMORY_SIZE
+    )
+    try:
+        chunk_size = constants.IMAGE_DECODE_CHUNK_SIZE
+        for start in range(offset, len(data), chunk_size):
+            output.write(b64decode(
+                data[start:start + chunk_size],
+                validate=True,
+            ))
+    except binascii.Error:
+        output.close()
+        raise ValidationError('Некорректный файл изображения')
+    output.seek(0)
+    return output
+
+
+def verify_image(file: SpooledTemporaryFile) -> str:
+    """Проверяет изображение и возвращает расширение файла. Формат и
+    размеры определяются по заголовку файла до полного декодирования,
+    целостность - `Image.verify()` без декодирования пикселей."""
+    try:
+        with Image.open(file, formats=tuple(IMAGE_EXTENSIONS)) as image:
+            width, height = image.size
+            if (
+                width > constants.IMAGE_MAX_WIDTH
+                or height > constants.IMAGE_MAX_HEIGHT
+            ):
+                raise ValidationError(
+                    'Размер изображения не должен превышать '
+                    f'{constants.IMAGE_MAX_WIDTH}x'
+                    f'{constants.IMAGE_MAX_HEIGHT} пикселей'
+                )
+            image.verify()
+            extension = IMAGE_EXTENSIONS[image.format]
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        raise ValidationError('Некорректный файл изображения')
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError('Файл изображения поврежден')
+    file.seek(0)
+    return extension
+
+
+def base64_to_image_file(data: str) -> File:
+    """Преобразует base64 строку (в том числе data URI) в файл
+    изображения. Префикс data URI пропускается без копирования строки.
+    Пробельные символы, например переносы строк base64 по 76 символов,
+    удаляются; строка копируется, только если они есть."""
+    offset = 0
+    if data.startswith('data:') and ';base64,' in data:
+        offset = data.index(';base64,') + len(';base64,')
+    if WHITESPACE.search(data, offset):
+        data, offset = WHITESPACE.sub('', data[offset:]), 0
+    decoded = decode_base64(data, offset)
+    try:
+        extension = verify_image(decoded)
+    except ValidationError:
+        decoded.close()
+        raise
+    image_file = File(decoded, name=f'{str(uuid.uuid4())[:12]}.{extension}')
+    image_file.size = decoded_size(data, offset)
+    return image_file
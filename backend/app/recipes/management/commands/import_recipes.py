@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from orjson import dumps, loads
+
+from app.recipes.bulk import bulk_create_recipes
+from foodgram_backend import constants
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда массового импорта рецептов из json файла"""
+    help = "import recipes of one author from json file"
+
+    def add_arguments(self, parser):
+        """Извлекаем аргументы из строки команды"""
+        parser.add_argument(
+            'path',
+            type=str,
+            help='json файл со списком рецептов в формате POST /api/recipes/',
+        )
+        parser.add_argument(
+            '--author',
+            required=True,
+            help='email автора рецептов',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constants.RECIPES_BULK_MAX_ITEMS,
+            help='количество рецептов в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        """Создаем рецепты частями, ошибки выводим по номеру рецепта в
+        файле"""
+        try:
+            author = User.objects.get(email=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["author"]} не найден')
+        with open(options['path'], 'rb') as data:
+            recipes = loads(data.read())
+        if not isinstance(recipes, list):
+            raise CommandError('Файл должен содержать список рецептов')
+
+        batch_size = options['batch_size']
+        created = failed = 0
+        for start in range(0, len(recipes), batch_size):
+            result = bulk_create_recipes(
+                recipes[start:start + batch_size], author
+            )
+            created += len(result['created'])
+            failed += len(result['errors'])
+            for error in result['errors']:
+                self.stderr.write(
+                    f'Рецепт {start + error["index"]}: '
+                    f'{dumps(error["errors"]).decode()}'
+                )
+        self.stdout.write(
+            f'Импорт завершен: создано {created} рецептов, '
+            f'с ошибками {failed}'
+        )
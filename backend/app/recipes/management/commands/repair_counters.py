@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from app.core.counters import count_related
+from app.recipes.models import Favorite, Recipe, ShoppingCart
+from app.users.models import Sub
+from foodgram_backend import constants
+
+User = get_user_model()
+
+# Модель - {счетчик: (модель связанных записей, поле ссылки на модель)}.
+COUNTERS = {
+    Recipe: {
+        'favorites_count': (Favorite, 'recipe'),
+        'shopping_cart_count': (ShoppingCart, 'recipe'),
+    },
+    User: {
+        'recipes_count': (Recipe, 'author'),
+        'subscribers_count': (Sub, 'subscription'),
+    },
+}
+
+
+class Command(BaseCommand):
+    """Пересчет денормализованных счетчиков пользователей и рецептов"""
+    help = "recompute recipe and user counters in batches"
+
+    def add_arguments(self, parser):
+        """Извлекаем аргументы из строки команды"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constants.REPAIR_COUNTERS_BATCH_SIZE,
+            help='количество записей в одном UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        """Пересчитываем счетчики диапазонами id, обновляются только
+        записи с неверным значением"""
+        batch_size = options['batch_size']
+        for model, counters in COUNTERS.items():
+            bounds = model.objects.aggregate(first=Min('pk'), last=Max('pk'))
+            if bounds['first'] is None:
+                continue
+            for field, (related_model, related_field) in counters.items():
+                actual = count_related(related_model, related_field)
+                repaired = 0
+                for start in range(
+                        bounds['first'], bounds['last'] + 1, batch_size
+                ):
+                    repaired += model.objects.filter(
+                        pk__gte=start, pk__lt=start + batch_size
+                    ).exclude(**{field: actual}).update(**{field: actual})
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}, {field}: '
+                    f'исправлено {repaired}'
+                )
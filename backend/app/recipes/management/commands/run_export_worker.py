@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.recipes.exports import (
+    claim_export,
+    delete_expired_exports,
+    process_export
+)
+from foodgram_backend import constants
+
+
+class Command(BaseCommand):
+    """Воркер очереди выгрузок списков покупок в pdf"""
+    help = "render queued shopping list exports"
+
+    def add_arguments(self, parser):
+        """Извлекаем аргументы из строки команды"""
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='обработать задания в очереди и завершиться',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=constants.EXPORT_WORKER_POLL_INTERVAL,
+            help='пауза между проверками пустой очереди в секундах',
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатываем задания из очереди и периодически удаляем
+        устаревшие задания"""
+        next_cleanup = time.monotonic()
+        while True:
+            close_old_connections()
+            if time.monotonic() >= next_cleanup:
+                deleted = delete_expired_exports()
+                if deleted:
+                    self.stdout.write(
+                        f'Удалено устаревших выгрузок: {deleted}'
+                    )
+                next_cleanup = (
+                    time.monotonic() + constants.EXPORT_CLEANUP_INTERVAL
+                )
+            job = claim_export()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            try:
+                process_export(job)
+            except Exception as error:
+                self.stderr.write(f'Выгрузка {job.pk}: ошибка {error}')
+            else:
+                self.stdout.write(f'Выгрузка {job.pk}: готово')
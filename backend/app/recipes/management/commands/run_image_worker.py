@@ -0,0 +1,78 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.recipes.image_variants import (
+    pending_image_variants,
+    render_image_variants,
+    save_image_variants
+)
+from foodgram_backend import constants
+
+
+class Command(BaseCommand):
+    """Воркер формирования вариантов изображений рецептов"""
+    help = "render card, detail and thumbnail variants of recipe images"
+
+    def add_arguments(self, parser):
+        """Извлекаем аргументы из строки команды"""
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='обработать изображения в очереди и завершиться',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=constants.IMAGE_WORKER_POLL_INTERVAL,
+            help='пауза между проверками пустой очереди в секундах',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help='количество процессов обработки (по умолчанию по числу '
+                 'процессоров)',
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатываем изображения из очереди в пуле процессов"""
+        # Процессы запускаются через spawn, чтобы не наследовать соединения
+        # с базой данных родительского процесса.
+        with ProcessPoolExecutor(
+            max_workers=options['processes'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as pool:
+            while True:
+                close_old_connections()
+                pending = pending_image_variants(
+                    constants.IMAGE_WORKER_BATCH_SIZE
+                )
+                if not pending:
+                    if options['once']:
+                        return
+                    time.sleep(options['interval'])
+                    continue
+                futures = {
+                    pool.submit(render_image_variants, source): (
+                        recipe_id, source
+                    )
+                    for recipe_id, source in pending
+                }
+                for future in as_completed(futures):
+                    recipe_id, source = futures[future]
+                    try:
+                        variants = future.result()
+                    except Exception as error:
+                        variants = {}
+                        self.stderr.write(
+                            f'Рецепт {recipe_id}: ошибка {error}'
+                        )
+                    else:
+                        self.stdout.write(f'Рецепт {recipe_id}: готово')
+                    save_image_variants(recipe_id, source, variants)
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_shopping_list(apps, schema_editor):
+    """Заполняет списки покупок по текущему содержимому корзин"""
+    IngredientsRecipes = apps.get_model('recipes', 'IngredientsRecipes')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    totals = IngredientsRecipes.objects.filter(
+        recipe__shoppingcart__isnull=False,
+    ).values(
+        'ingredient_id', user_id=models.F('recipe__shoppingcart__user_id'),
+    ).annotate(total=models.Sum('amount')).order_by()
+    ShoppingListItem.objects.bulk_create(
+        [
+            ShoppingListItem(
+                user_id=item['user_id'],
+                ingredient_id=item['ingredient_id'],
+                amount=item['total'],
+            )
+            for item in totals.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ingredients', '0006_alter_ingredient_name_ingredient_unique_ingredient'),
+        ('recipes', '0008_alter_recipe_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ingredients.ingredient', verbose_name='Ингридиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент списка покупок',
+                'verbose_name_plural': 'Ингредиенты списка покупок',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_ingredient_for_user'),
+        ),
+        migrations.RunPython(fill_shopping_list, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('processing', 'Формируется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('content_hash', models.CharField(db_index=True, max_length=64, verbose_name='Хеш содержимого')),
+                ('items', models.JSONField(verbose_name='Содержимое списка покупок')),
+                ('file', models.FileField(blank=True, upload_to='exports/%Y/%m/%d', verbose_name='Файл')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_exports', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Выгрузка списка покупок',
+                'verbose_name_plural': 'Выгрузки списков покупок',
+                'ordering': ('id',),
+                'indexes': [models.Index(fields=['status', 'id'], name='shopping_list_export_queue')],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'], name='recipe_search_vector'
+)
+
+# Триггер поддерживает search_vector при любой записи рецепта, включая
+# bulk_create и update(). Название весомее описания.
+CREATE_TRIGGER = """
+CREATE FUNCTION recipes_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_recipe_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector_update();
+
+UPDATE recipes_recipe SET name = name;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger ON recipes_recipe;
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector_update();
+"""
+
+
+def create_search(apps, schema_editor):
+    """Создает GIN индекс и триггер. Только для Postgres, на других базах
+    данных (SQLite в тестах) поиск работает без search_vector."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('recipes', 'Recipe'), SEARCH_INDEX)
+    schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_TRIGGER)
+    schema_editor.remove_index(
+        apps.get_model('recipes', 'Recipe'), SEARCH_INDEX
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_shoppinglistexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='recipe',
+                    index=SEARCH_INDEX,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search, drop_search),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты изображения'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants_source',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Изображение вариантов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('image_variants_source', models.F('image')), _negated=True), fields=['id'], name='recipe_image_variants_queue'),
+        ),
+    ]
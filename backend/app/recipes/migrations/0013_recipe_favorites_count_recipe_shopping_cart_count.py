@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:56
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    """Подзапрос количества записей `model`, ссылающихся полем `field` на
+    обновляемую запись"""
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')}).values(
+                field
+            ).annotate(total=models.Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счетчики рецептов по текущим данным"""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(
+        favorites_count=count_related(
+            apps.get_model('recipes', 'Favorite'), 'recipe'
+        ),
+        shopping_cart_count=count_related(
+            apps.get_model('recipes', 'ShoppingCart'), 'recipe'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В корзинах покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
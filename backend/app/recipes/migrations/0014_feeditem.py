@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FEED_BACKFILL_LIMIT = 500
+
+
+def fill_feeds(apps, schema_editor):
+    """Заполняет ленты по текущим подпискам: последние рецепты авторов"""
+    Sub = apps.get_model('users', 'Sub')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FeedItem = apps.get_model('recipes', 'FeedItem')
+    for user_id, author_id in Sub.objects.values_list(
+            'user_id', 'subscription_id'
+    ).iterator():
+        recipes = Recipe.objects.filter(author_id=author_id).order_by(
+            '-created'
+        ).values_list('id', 'created')[:FEED_BACKFILL_LIMIT]
+        FeedItem.objects.bulk_create(
+            [
+                FeedItem(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    published=created,
+                )
+                for recipe_id, created in recipes
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0013_recipe_favorites_count_recipe_shopping_cart_count'),
+        ('users', '0006_user_recipes_count_user_subscribers_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+                ('published', models.DateTimeField(verbose_name='Опубликован')),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рецепт ленты подписок',
+                'verbose_name_plural': 'Ленты подписок',
+                'ordering': ('-published', '-id'),
+                'indexes': [models.Index(fields=['user', '-published', '-id'], name='feed_item_user_published'), models.Index(fields=['user', 'author'], name='feed_item_user_author')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_item_for_user'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
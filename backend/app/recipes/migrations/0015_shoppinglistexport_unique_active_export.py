@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+def fail_duplicate_exports(apps, schema_editor):
+    """Оставляет одно активное задание на пользователя и содержимое,
+    остальные помечает ошибкой"""
+    ShoppingListExport = apps.get_model('recipes', 'ShoppingListExport')
+    active = ShoppingListExport.objects.filter(
+        status__in=('pending', 'processing')
+    )
+    kept = set()
+    duplicates = []
+    for pk, user_id, content_hash in active.order_by('id').values_list(
+            'id', 'user_id', 'content_hash'
+    ):
+        if (user_id, content_hash) in kept:
+            duplicates.append(pk)
+        kept.add((user_id, content_hash))
+    ShoppingListExport.objects.filter(pk__in=duplicates).update(
+        status='failed', error='Дубликат задания'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_feeditem'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            fail_duplicate_exports, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistexport',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'processing'))), fields=('user', 'content_hash'), name='unique_active_shopping_list_export'),
+        ),
+    ]
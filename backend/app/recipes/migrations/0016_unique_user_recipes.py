@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:44
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    """Подзапрос количества записей `model`, ссылающихся полем `field` на
+    обновляемую запись"""
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')}).values(
+                field
+            ).annotate(total=models.Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def delete_duplicates(model):
+    """Удаляет повторные связи пользователь - рецепт, оставляя первую.
+    Возвращает пары (пользователь, рецепт), у которых были повторы."""
+    duplicates = model.objects.values('user_id', 'recipe_id').annotate(
+        first=models.Min('id'), total=models.Count('id')
+    ).filter(total__gt=1).order_by()
+    pairs = []
+    for item in duplicates:
+        model.objects.filter(
+            user_id=item['user_id'], recipe_id=item['recipe_id']
+        ).exclude(id=item['first']).delete()
+        pairs.append((item['user_id'], item['recipe_id']))
+    return pairs
+
+
+def remove_duplicate_user_recipes(apps, schema_editor):
+    """Удаляет повторы в избранном и корзинах, пересчитывает счетчики
+    затронутых рецептов и списки покупок затронутых пользователей"""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    IngredientsRecipes = apps.get_model('recipes', 'IngredientsRecipes')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    favorites = delete_duplicates(Favorite)
+    carts = delete_duplicates(ShoppingCart)
+    Recipe.objects.filter(
+        id__in={recipe_id for _, recipe_id in favorites}
+    ).update(favorites_count=count_related(Favorite, 'recipe'))
+    Recipe.objects.filter(
+        id__in={recipe_id for _, recipe_id in carts}
+    ).update(shopping_cart_count=count_related(ShoppingCart, 'recipe'))
+    user_ids = {user_id for user_id, _ in carts}
+    if not user_ids:
+        return
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    totals = IngredientsRecipes.objects.filter(
+        recipe__shoppingcart__user_id__in=user_ids,
+    ).values(
+        'ingredient_id', user_id=models.F('recipe__shoppingcart__user_id'),
+    ).annotate(total=models.Sum('amount')).order_by()
+    ShoppingListItem.objects.bulk_create([
+        ShoppingListItem(
+            user_id=item['user_id'],
+            ingredient_id=item['ingredient_id'],
+            amount=item['total'],
+        )
+        for item in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_shoppinglistexport_unique_active_export'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_user_recipes, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favorite_for_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shoppingcart_for_user'),
+        ),
+    ]
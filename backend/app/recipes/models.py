@@ -1,16 +1,20 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
-from app.core.models import BaseModelMixin
+from app.core.models import BaseModelMixin, CounterFieldsMixin
 from app.ingredients.models import Ingredient
 from app.tags.models import Tag
 
 User = get_user_model()
 
 
-class Recipe(BaseModelMixin):
+class Recipe(CounterFieldsMixin, BaseModelMixin):
     """Модель рецепта"""
+    counter_fields = ('favorites_count', 'shopping_cart_count')
+
     tags = models.ManyToManyField(
         to=Tag,
         verbose_name='Теги',
@@ -51,15 +55,61 @@ class Recipe(BaseModelMixin):
         verbose_name='Время приготовления (в минутах)',
         validators=[MinValueValidator(1)],
     )
+    # Заполняется триггером Postgres из названия и описания
+    # (см. миграцию 0011_recipe_search_vector).
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Имена файлов вариантов изображения `{вариант: {расширение: имя}}`
+    # и изображение, для которого они сформированы. Заполняются воркером
+    # `run_image_worker`.
+    image_variants = models.JSONField(
+        verbose_name='Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    image_variants_source = models.CharField(
+        verbose_name='Изображение вариантов',
+        max_length=100,
+        blank=True,
+        editable=False,
+    )
+    # Денормализованные счетчики, изменяются через `change_counter`
+    # (см. `signals.py`), пересчитываются командой `repair_counters`.
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        verbose_name='В корзинах покупок',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-created', 'id')
+        indexes = [
+            GinIndex(fields=['search_vector'], name='recipe_search_vector'),
+            models.Index(
+                fields=['id'],
+                condition=~models.Q(image_variants_source=models.F('image')),
+                name='recipe_image_variants_queue',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def current_image_variants(self) -> dict[str, dict[str, str]]:
+        """Варианты текущего изображения. Пока варианты нового
+        изображения не сформированы, возвращается пустой словарь."""
+        if self.image_variants_source != self.image.name:
+            return {}
+        return self.image_variants
+
 
 class RecipesTags(BaseModelMixin):
     """Сущность для связи рецепт - тег"""
@@ -140,8 +190,10 @@ class BaseUserRecipeMixin(BaseModelMixin):
 
 class Favorite(BaseUserRecipeMixin):
     """Избранное"""
+    # Счетчик рецепта, который изменяется вместе с записями модели.
+    counter_field = 'favorites_count'
 
-    class Meta:
+    class Meta(BaseUserRecipeMixin.Meta):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         ordering = ('id',)
@@ -149,8 +201,141 @@ class Favorite(BaseUserRecipeMixin):
 
 class ShoppingCart(BaseUserRecipeMixin):
     """Список покупок"""
+    counter_field = 'shopping_cart_count'
 
-    class Meta:
+    class Meta(BaseUserRecipeMixin.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
         ordering = ('id',)
+
+
+class ShoppingListItem(BaseModelMixin):
+    """Суммарное количество ингредиента в списке покупок пользователя.
+    Поддерживается инкрементально при изменении корзины покупок и
+    ингредиентов рецептов из корзины (см. `shopping_list.py`)."""
+    user = models.ForeignKey(
+        to=User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list',
+    )
+    ingredient = models.ForeignKey(
+        to=Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингридиент',
+        related_name='+',
+    )
+    amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списка покупок'
+        ordering = ('id',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_ingredient_for_user',
+            )
+        ]
+
+
+class ShoppingListExport(BaseModelMixin):
+    """Задание на формирование pdf документа списка покупок. Задания
+    выполняет воркер `manage.py run_export_worker`. Задания с одинаковым
+    содержимым списка (`content_hash`) используют один и тот же файл."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        PROCESSING = 'processing', 'Формируется'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+
+    user = models.ForeignKey(
+        to=User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list_exports',
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    content_hash = models.CharField(
+        verbose_name='Хеш содержимого',
+        max_length=64,
+        db_index=True,
+    )
+    items = models.JSONField(verbose_name='Содержимое списка покупок')
+    file = models.FileField(
+        verbose_name='Файл',
+        upload_to='exports/%Y/%m/%d',
+        blank=True,
+    )
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Выгрузка списка покупок'
+        verbose_name_plural = 'Выгрузки списков покупок'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['status', 'id'], name='shopping_list_export_queue'
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'content_hash'],
+                condition=models.Q(status__in=('pending', 'processing')),
+                name='unique_active_shopping_list_export',
+            )
+        ]
+
+
+class FeedItem(BaseModelMixin):
+    """Рецепт в ленте подписок пользователя. Лента заполняется при записи:
+    при публикации рецепта он добавляется в ленты подписчиков автора, при
+    подписке в ленту добавляются рецепты автора, при отписке удаляются
+    (см. `feed.py`). Чтение ленты - один проход по индексу
+    `feed_item_user_published`."""
+    user = models.ForeignKey(
+        to=User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='feed',
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        to=Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='+',
+    )
+    author = models.ForeignKey(
+        to=User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='+',
+        db_index=False,
+    )
+    published = models.DateTimeField(verbose_name='Опубликован')
+
+    class Meta:
+        verbose_name = 'Рецепт ленты подписок'
+        verbose_name_plural = 'Ленты подписок'
+        ordering = ('-published', '-id')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_item_for_user'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-published', '-id'],
+                name='feed_item_user_published',
+            ),
+            models.Index(
+                fields=['user', 'author'], name='feed_item_user_author'
+            ),
+        ]
@@ -0,0 +1,110 @@
+from functools import cache
+from tempfile import TemporaryFile
+from typing import IO, Iterable, Iterator
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from foodgram_backend import constants
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LINE_HEIGHT = constants.PDF_TEXT_FONT_SIZE + constants.PDF_GAP
+NAME_COLUMN_WIDTH = (
+    PAGE_WIDTH - 2 * constants.PDF_INDENT
+    - constants.PDF_AMOUNT_COLUMN_WIDTH - constants.PDF_UNIT_COLUMN_WIDTH
+)
+AMOUNT_COLUMN_RIGHT = (
+    PAGE_WIDTH - constants.PDF_INDENT - constants.PDF_UNIT_COLUMN_WIDTH
+    - constants.PDF_GAP
+)
+UNIT_COLUMN_LEFT = (
+    PAGE_WIDTH - constants.PDF_INDENT - constants.PDF_UNIT_COLUMN_WIDTH
+)
+
+
+@cache
+def register_fonts() -> None:
+    """Регистрирует шрифт документа. TTF файл разбирается один раз на
+    процесс (воркер gunicorn)."""
+    pdfmetrics.registerFont(TTFont(
+        constants.PDF_FONT_NAME,
+        constants.PDF_FONT_DIR / constants.PDF_FONT_FILE
+    ))
+
+
+class ShoppingListPDF:
+    """Многостраничный документ списка покупок с колонками
+    "Ингредиент", "Количество" и "Единица измерения"."""
+
+    def __init__(self, output: IO[bytes]):
+        register_fonts()
+        self.canvas = Canvas(output, pagesize=A4)
+        self.page_number = 0
+        self.y = 0
+
+    def start_page(self) -> None:
+        """Начинает новую страницу: заголовок, шапка таблицы и номер
+        страницы"""
+        if self.page_number:
+            self.canvas.showPage()
+        self.page_number += 1
+        canvas = self.canvas
+        canvas.setFont(constants.PDF_FONT_NAME, constants.PDF_TITLE_FONT_SIZE)
+        canvas.drawCentredString(
+            PAGE_WIDTH / 2, PAGE_HEIGHT - constants.PDF_INDENT,
+            'Список покупок:'
+        )
+        canvas.setFont(constants.PDF_FONT_NAME, constants.PDF_TEXT_FONT_SIZE)
+        canvas.drawCentredString(
+            PAGE_WIDTH / 2, constants.PDF_INDENT / 2,
+            f'Страница {self.page_number}'
+        )
+        self.y = PAGE_HEIGHT - constants.PDF_INDENT - 2 * LINE_HEIGHT
+        self.draw_row('Ингредиент', 'Количество', 'Ед. изм.')
+        # Линия под шапкой таблицы, ниже выносных элементов букв.
+        line_y = self.y + LINE_HEIGHT - constants.PDF_TEXT_FONT_SIZE / 3
+        canvas.line(
+            constants.PDF_INDENT, line_y,
+            PAGE_WIDTH - constants.PDF_INDENT, line_y,
+        )
+        self.y -= constants.PDF_GAP
+
+    def draw_row(self, name: str, amount: str, unit: str) -> None:
+        """Выводит строку таблицы. Длинное название переносится на
+        несколько строк, при нехватке места начинается новая страница."""
+        name_lines = simpleSplit(
+            name, constants.PDF_FONT_NAME, constants.PDF_TEXT_FONT_SIZE,
+            NAME_COLUMN_WIDTH,
+        ) or ['']
+        if self.y - LINE_HEIGHT * len(name_lines) < constants.PDF_INDENT:
+            self.start_page()
+        canvas = self.canvas
+        canvas.drawRightString(AMOUNT_COLUMN_RIGHT, self.y, amount)
+        canvas.drawString(UNIT_COLUMN_LEFT, self.y, unit)
+        for line in name_lines:
+            canvas.drawString(constants.PDF_INDENT, self.y, line)
+            self.y -= LINE_HEIGHT
+
+    def render(self, ingredients: Iterable[tuple[str, int, str]]) -> None:
+        """Выводит все ингредиенты и сохраняет документ"""
+        self.start_page()
+        for name, amount, unit in ingredients:
+            self.draw_row(name, str(amount), unit)
+        self.canvas.save()
+
+
+def iter_pdf(ingredients: Iterable[tuple[str, int, str]]) -> Iterator[bytes]:
+    """Формирует документ во временном файле на диске и отдает его
+    частями. Ответ не копирует документ в память целиком, но сам документ
+    не потоковый: reportlab держит все страницы в памяти до `save()`, и
+    первая часть отдается после формирования всего документа. Список
+    покупок - одна строка на ингредиент, поэтому его размер ограничен
+    справочником ингредиентов."""
+    with TemporaryFile() as output:
+        ShoppingListPDF(output).render(ingredients)
+        output.seek(0)
+        while chunk := output.read(constants.PDF_CHUNK_SIZE):
+            yield chunk
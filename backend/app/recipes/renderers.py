@@ -0,0 +1,90 @@
+import csv
+from typing import Iterable, Iterator
+
+from orjson import dumps
+from rest_framework.renderers import BaseRenderer
+
+from .pdf import iter_pdf
+
+# Строка списка покупок: id ингредиента, название, количество, единица.
+ShoppingListRow = tuple[int, str, int, str]
+
+
+class Echo:
+    """Псевдо-файл для `csv.writer`: возвращает записанную строку вместо
+    сохранения в буфер"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер списка покупок. Используется для согласования
+    формата по заголовку `Accept` или параметру `?format=`, сам документ
+    формируется потоково методом `stream`. Ошибки (например, 401)
+    отдаются в виде JSON."""
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Рендер обычного (не потокового) ответа, то есть ошибки"""
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return dumps(data)
+
+    def stream(self, rows: Iterable[ShoppingListRow]) -> Iterator[bytes]:
+        """Формирует документ частями по мере чтения строк из базы
+        данных"""
+        raise NotImplementedError
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+    def stream(self, rows: Iterable[ShoppingListRow]) -> Iterator[bytes]:
+        return iter_pdf(
+            (name, amount, unit) for _, name, amount, unit in rows
+        )
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows: Iterable[ShoppingListRow]) -> Iterator[bytes]:
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения')
+        ).encode()
+        for _, name, amount, unit in rows:
+            yield writer.writerow((name, amount, unit)).encode()
+
+
+class PlainTextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def stream(self, rows: Iterable[ShoppingListRow]) -> Iterator[bytes]:
+        yield 'Список покупок:\n'.encode()
+        for _, name, amount, unit in rows:
+            yield f'{name} — {amount} {unit}\n'.encode()
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, rows: Iterable[ShoppingListRow]) -> Iterator[bytes]:
+        separator = b'['
+        for ingredient_id, name, amount, unit in rows:
+            yield separator + dumps({
+                'id': ingredient_id,
+                'name': name,
+                'measurement_unit': unit,
+                'amount': amount,
+            })
+            separator = b','
+        yield b']' if separator == b',' else b'[]'
@@ -0,0 +1,19 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+
+SEARCH_CONFIG = 'russian'
+
+
+def search_recipes(queryset: QuerySet, value: str) -> QuerySet:
+    """Полнотекстовый поиск рецептов по названию и описанию с сортировкой
+    по релевантности. На Postgres использует search_vector и GIN индекс,
+    на остальных базах данных (SQLite в тестах) - поиск подстроки."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            Q(name__icontains=value) | Q(text__icontains=value)
+        )
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', *queryset.model._meta.ordering)
@@ -1,53 +1,47 @@
-import base64
-import imghdr
-import uuid
 from typing import Any
 
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
-from django.db import models, transaction
+from django.core.files import File
+from django.db import transaction
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
 
 from app.ingredients.models import Ingredient
 from app.tags.models import Tag
-from app.tags.serializers import TagSerializer
+from app.tags.registry import TagPrimaryKeyRelatedField, get_tag_registry
 from app.users.serializers import ShortRecipeSerializer, UserSerializer
-from foodgram_backend.constants import MIN_COOKING_TIME, MIN_INGREDIENT_AMOUNT
-
-from .models import Favorite, IngredientsRecipes, Recipe
+from foodgram_backend.constants import (
+    MIN_COOKING_TIME,
+    MIN_INGREDIENT_AMOUNT,
+    USER_RECIPES_BULK_MAX_ITEMS
+)
+
+from .fields import ImageVariantsField
+from .images import base64_to_image_file
+from .models import (
+    IngredientsRecipes,
+    Recipe,
+    ShoppingListExport,
+    ShoppingListItem
+)
+from .shopping_list import rebuild_recipe_shopping_lists
 
 User = get_user_model()
 
 
 class Base64ImageField(serializers.FileField):
     """Класс для получения изображения из base64 строки"""
-    def to_internal_value(self, data: str) -> ContentFile:
-        """Преобразование base64 строки в файл изображения"""
+    def to_internal_value(self, data: str) -> File:
+        """Преобразование base64 строки в файл изображения. Строка
+        декодируется частями во временный файл с ограничением размера,
+        изображение проверяется по заголовку и `Image.verify()`."""
         if isinstance(data, str):
-            if 'data:' in data and ';base64,' in data:
-                header, data = data.split(';base64,')
-            try:
-                decoded_file = base64.b64decode(data)
-            except TypeError:
-                raise ValidationError('Некорректный файл изображения')
-            file_name = str(uuid.uuid4())[:12]
-            file_extension = self.get_file_extension(file_name, decoded_file)
-            complete_file_name = "%s.%s" % (file_name, file_extension, )
-            data = ContentFile(decoded_file, name=complete_file_name)
+            data = base64_to_image_file(data)
 
         return super().to_internal_value(data)
 
-    def get_file_extension(
-            self, file_name: str, decoded_file: bytes
-    ) -> str | None:
-        """Определяет расширение файла изображения по его содержимому"""
-        extension = imghdr.what(file_name, decoded_file)
-        extension = "jpg" if extension == "jpeg" else extension
-
-        return extension
-
 
 class IngredientRecipeReadSerializer(serializers.ModelSerializer):
     """Сериализатор модели связи между моделями ингредиентов и рецептов для
@@ -84,14 +78,33 @@ class IngredientsRecipesWriteSerializer(serializers.ModelSerializer):
 class RecipeReadSerializer(serializers.ModelSerializer):
     """Сериализатор рецептов для операций чтения"""
     author = UserSerializer(many=False, read_only=True)
-    tags = TagSerializer(many=True)
+    tags = serializers.SerializerMethodField()
     ingredients = IngredientRecipeReadSerializer(source='recipes', many=True)
     is_favorited = serializers.BooleanField()
     is_in_shopping_cart = serializers.BooleanField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        exclude = ('created', 'modified', 'shopping_cart', 'favorites')
+        exclude = (
+            'created',
+            'modified',
+            'shopping_cart',
+            'favorites',
+            'search_vector',
+            'image_variants_source',
+            'favorites_count',
+            'shopping_cart_count',
+        )
+
+    def get_tags(self, obj: Recipe) -> list[dict]:
+        """Теги рецепта из справочника тегов в памяти. Из базы данных
+        читаются только связи рецепт - тег."""
+        if 'tag_registry' not in self.context:
+            self.context['tag_registry'] = get_tag_registry()
+        return self.context['tag_registry'].serialize(
+            relation.tags_id for relation in obj.recipestags_set.all()
+        )
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
@@ -100,14 +113,22 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         default=serializers.CurrentUserDefault()
     )
     ingredients = IngredientsRecipesWriteSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
-    )
+    tags = TagPrimaryKeyRelatedField(many=True)
     image = Base64ImageField()
 
     class Meta:
         model = Recipe
-        exclude = ('created', 'modified', 'shopping_cart', 'favorites')
+        exclude = (
+            'created',
+            'modified',
+            'shopping_cart',
+            'favorites',
+            'search_vector',
+            'image_variants',
+            'image_variants_source',
+            'favorites_count',
+            'shopping_cart_count',
+        )
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         """Валидация"""
@@ -116,8 +137,15 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {'ingredients': 'Должно быть не пустым'}
             )
+        # При массовом создании существующие id ингредиентов всех рецептов
+        # загружаются заранее одним запросом и передаются в контексте.
+        existing_ingredients_id = self.context.get('ingredient_ids')
+        if existing_ingredients_id is None:
+            existing_ingredients_id = set(Ingredient.objects.filter(
+                id__in=[ingredient['id'] for ingredient in ingredients]
+            ).values_list('id', flat=True))
         for ingredient in ingredients:
-            if not Ingredient.objects.filter(id=ingredient['id']).exists():
+            if ingredient['id'] not in existing_ingredients_id:
                 raise ValidationError(
                     {'ingredients': 'Указан ID несуществующего ингредиента'}
                 )
@@ -158,7 +186,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         IngredientsRecipes.objects.bulk_create(
             [IngredientsRecipes(
                 recipe=recipe,
-                ingredient=Ingredient.objects.get(pk=ingredient['id']),
+                ingredient_id=ingredient['id'],
                 amount=ingredient['amount'],
             )
                 for ingredient in ingredients
@@ -170,18 +198,10 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         """Создание рецепта"""
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        user = self.context.get('request').user
         recipe = Recipe.objects.create(**validated_data)
-        subquery_favorites = Favorite.objects.filter(
-            recipe=models.OuterRef('pk'), user=user
-        )
-        subquery_shopping_cart = Favorite.objects.filter(
-            recipe=models.OuterRef('pk'), user=user
-        )
-        recipe = Recipe.objects.filter(id=recipe.id).annotate(
-            is_favorited=models.Exists(subquery_favorites),
-            is_in_shopping_cart=models.Exists(subquery_shopping_cart),
-        ).first()
+        # Только что созданный рецепт не может быть в избранном или корзине.
+        recipe.is_favorited = False
+        recipe.is_in_shopping_cart = False
         self.set_tags(tags, recipe)
         self.set_ingredients(ingredients, recipe)
         return recipe
@@ -202,11 +222,49 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         instance.ingredients.through.objects.filter(recipe=instance).delete()
         self.set_tags(tags, instance)
         self.set_ingredients(ingredients, instance)
+        rebuild_recipe_shopping_lists(instance.id)
 
         instance.save()
         return instance
 
 
+class RecipeBulkItemSerializer(RecipeWriteSerializer):
+    """Сериализатор рецепта при массовом создании. Автор задается для всех
+    рецептов сразу, рецепты сохраняются в `bulk_create_recipes`."""
+    author = None
+
+    class Meta(RecipeWriteSerializer.Meta):
+        exclude = RecipeWriteSerializer.Meta.exclude + ('author',)
+
+
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Сериализатор ингредиента списка покупок"""
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.ReadOnlyField()
+    measurement_unit = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class ShoppingListExportSerializer(serializers.ModelSerializer):
+    """Сериализатор задания на выгрузку списка покупок"""
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShoppingListExport
+        fields = ('id', 'status', 'created', 'download_url')
+
+    def get_download_url(self, obj: ShoppingListExport) -> str | None:
+        """Ссылка на скачивание готового документа"""
+        if obj.status != ShoppingListExport.Status.DONE:
+            return None
+        url = reverse('ShoppingListExports-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
 class UserRecipeSerializer(serializers.Serializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
     recipe = serializers.PrimaryKeyRelatedField(queryset=Recipe.objects.all())
@@ -229,3 +287,17 @@ class UserRecipeSerializer(serializers.Serializer):
                 'Такого рецепта нет в данном списке'
             )
         return attrs
+
+
+class UserRecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления в избранное или корзину
+    покупок и удаления из них"""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=USER_RECIPES_BULK_MAX_ITEMS,
+    )
+
+    def validate_recipes(self, value: list[int]) -> list[int]:
+        """Убирает повторы, сохраняя порядок"""
+        return list(dict.fromkeys(value))
@@ -0,0 +1,112 @@
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, QuerySet, Sum
+
+from .models import IngredientsRecipes, ShoppingCart, ShoppingListItem
+
+User = get_user_model()
+
+
+def get_shopping_list(user_id: int) -> QuerySet:
+    """Список покупок пользователя: ингредиенты с суммарным количеством"""
+    return ShoppingListItem.objects.filter(user_id=user_id).annotate(
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit__measurement_unit'),
+    ).order_by('name')
+
+
+def lock_shopping_lists(user_ids: Iterable[int]) -> None:
+    """Блокирует списки покупок пользователей до конца транзакции:
+    одновременные изменения списка одного пользователя выполняются по
+    очереди и не вставляют одну и ту же строку дважды. Блокируются строки
+    пользователей, потому что строк списка может еще не быть. Блокировка
+    `FOR NO KEY UPDATE` не мешает вставке строк, ссылающихся на
+    пользователя."""
+    list(
+        User.objects.select_for_update(no_key=True).filter(
+            pk__in=list(user_ids)
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+@transaction.atomic
+def change_shopping_list(
+        user_id: int, recipe_ids: Iterable[int], sign: int
+) -> None:
+    """Добавляет (`sign=1`) или вычитает (`sign=-1`) ингредиенты рецептов
+    в списке покупок пользователя"""
+    lock_shopping_lists([user_id])
+    amounts = dict(
+        IngredientsRecipes.objects.filter(
+            recipe_id__in=list(recipe_ids)
+        ).values('ingredient_id').annotate(
+            total=Sum('amount')
+        ).values_list('ingredient_id', 'total').order_by()
+    )
+    items = {
+        item.ingredient_id: item
+        for item in ShoppingListItem.objects.filter(
+            user_id=user_id, ingredient_id__in=amounts
+        )
+    }
+    new_items = []
+    for ingredient_id, amount in amounts.items():
+        if ingredient_id in items:
+            items[ingredient_id].amount += sign * amount
+        elif sign > 0:
+            new_items.append(ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            ))
+    ShoppingListItem.objects.bulk_create(new_items)
+    ShoppingListItem.objects.bulk_update(
+        [item for item in items.values() if item.amount > 0], ['amount']
+    )
+    ShoppingListItem.objects.filter(
+        pk__in=[item.pk for item in items.values() if item.amount <= 0]
+    ).delete()
+
+
+def add_recipe_to_shopping_list(user_id: int, recipe_id: int) -> None:
+    """Добавляет ингредиенты рецепта в список покупок пользователя"""
+    change_shopping_list(user_id, [recipe_id], 1)
+
+
+def remove_recipe_from_shopping_list(user_id: int, recipe_id: int) -> None:
+    """Вычитает ингредиенты рецепта из списка покупок пользователя"""
+    change_shopping_list(user_id, [recipe_id], -1)
+
+
+@transaction.atomic
+def rebuild_shopping_lists(user_ids: Iterable[int]) -> None:
+    """Пересчитывает списки покупок пользователей по содержимому их
+    корзин. Используется, когда меняются ингредиенты рецепта из корзины."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    lock_shopping_lists(user_ids)
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    totals = IngredientsRecipes.objects.filter(
+        recipe__shoppingcart__user_id__in=user_ids,
+    ).values(
+        'ingredient_id', user_id=F('recipe__shoppingcart__user_id'),
+    ).annotate(total=Sum('amount')).order_by()
+    ShoppingListItem.objects.bulk_create([
+        ShoppingListItem(
+            user_id=item['user_id'],
+            ingredient_id=item['ingredient_id'],
+            amount=item['total'],
+        )
+        for item in totals
+    ])
+
+
+def rebuild_recipe_shopping_lists(recipe_id: int) -> None:
+    """Пересчитывает списки покупок всех пользователей, у которых рецепт
+    лежит в корзине"""
+    rebuild_shopping_lists(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        )
+    )
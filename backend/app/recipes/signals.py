@@ -0,0 +1,186 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+)
+from django.dispatch import receiver
+
+from app.core.counters import change_counter
+from app.core.signals import track_counts
+from app.tags.models import Tag
+from app.users.models import Sub
+
+from .cache import (
+    invalidate_all_recipes,
+    invalidate_recipes,
+    invalidate_user_recipe_ids
+)
+from .feed import backfill_feed, fan_out_recipes, prune_feed
+from .models import (
+    Favorite,
+    IngredientsRecipes,
+    Recipe,
+    RecipesTags,
+    ShoppingCart
+)
+from .shopping_list import (
+    add_recipe_to_shopping_list,
+    rebuild_shopping_lists,
+    remove_recipe_from_shopping_list
+)
+
+User = get_user_model()
+
+# Поля пользователя, которые попадают в представление автора рецепта.
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+# Таблицы списка рецептов и его фильтров.
+track_counts(Recipe, RecipesTags, Favorite, ShoppingCart)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance: Recipe, **kwargs):
+    """Сбрасывает кеш при изменении рецепта"""
+    invalidate_recipes([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance: Recipe, created: bool, **kwargs):
+    """Увеличивает счетчик рецептов автора и добавляет рецепт в ленты
+    подписчиков автора"""
+    if created:
+        change_counter(User, 'recipes_count', [instance.author_id])
+        fan_out_recipes([instance])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted_counter(sender, instance: Recipe, **kwargs):
+    """Уменьшает счетчик рецептов автора"""
+    change_counter(User, 'recipes_count', [instance.author_id], -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def user_recipe_added(sender, instance, created: bool, **kwargs):
+    """Увеличивает счетчик рецепта в избранном или корзинах и сбрасывает
+    кеш множества рецептов пользователя"""
+    if created:
+        change_counter(Recipe, sender.counter_field, [instance.recipe_id])
+    invalidate_user_recipe_ids(sender, instance.user_id)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def user_recipe_removed(sender, instance, **kwargs):
+    """Уменьшает счетчик рецепта в избранном или корзинах и сбрасывает
+    кеш множества рецептов пользователя. Срабатывает и при каскадном
+    удалении рецепта или пользователя."""
+    change_counter(Recipe, sender.counter_field, [instance.recipe_id], -1)
+    invalidate_user_recipe_ids(sender, instance.user_id)
+
+
+@receiver(post_save, sender=IngredientsRecipes)
+@receiver(post_delete, sender=IngredientsRecipes)
+@receiver(post_save, sender=RecipesTags)
+@receiver(post_delete, sender=RecipesTags)
+def recipe_relation_changed(sender, instance, **kwargs):
+    """Сбрасывает кеш при изменении ингредиентов или тегов рецепта"""
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=RecipesTags)
+def recipe_tags_changed(sender, instance, action: str, reverse: bool,
+                        pk_set: set[int] | None, **kwargs):
+    """Сбрасывает кеш при изменении тегов рецепта через `recipe.tags`"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_recipes([instance.pk])
+    elif pk_set:
+        invalidate_recipes(pk_set)
+    else:
+        invalidate_all_recipes()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance: Tag, **kwargs):
+    """Сбрасывает кеш рецептов с измененным тегом"""
+    invalidate_recipes(
+        RecipesTags.objects.filter(tags=instance).values_list(
+            'recipe_id', flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance: User, created: bool,
+                   update_fields=None, **kwargs):
+    """Сбрасывает кеш рецептов автора при изменении его данных"""
+    if created:
+        return
+    if update_fields is not None and not AUTHOR_FIELDS & set(update_fields):
+        return
+    invalidate_recipes(instance.recipes.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance: ShoppingCart, created: bool,
+                        **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок"""
+    if created:
+        add_recipe_to_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_removed(sender, instance: ShoppingCart, **kwargs):
+    """Вычитает ингредиенты рецепта из списка покупок"""
+    remove_recipe_from_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance: Recipe, **kwargs):
+    """Запоминает пользователей, у которых удаляемый рецепт в корзине"""
+    instance.shopping_cart_user_ids = list(
+        ShoppingCart.objects.filter(recipe=instance).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance: Recipe, **kwargs):
+    """Пересчитывает списки покупок после удаления рецепта. Порядок
+    каскадного удаления строк корзины и ингредиентов рецепта не
+    определен, поэтому списки пересчитываются целиком."""
+    rebuild_shopping_lists(getattr(instance, 'shopping_cart_user_ids', []))
+
+
+@receiver(post_save, sender=Sub)
+def subscription_created(sender, instance: Sub, created: bool, **kwargs):
+    """Добавляет рецепты автора в ленту нового подписчика"""
+    if created:
+        backfill_feed(instance.user_id, instance.subscription_id)
+
+
+@receiver(post_delete, sender=Sub)
+def subscription_deleted(sender, instance: Sub, **kwargs):
+    """Удаляет рецепты автора из ленты бывшего подписчика"""
+    prune_feed(instance.user_id, instance.subscription_id)
+
+
+@receiver(m2m_changed, sender=Sub)
+def subscriptions_added(sender, instance: User, action: str, reverse: bool,
+                        pk_set: set[int] | None, **kwargs):
+    """Добавляет рецепты авторов в ленты при подписке через
+    `user.subscriptions.add()` или `user.users.add()`"""
+    if action != 'post_add' or not pk_set:
+        return
+    for pk in pk_set:
+        if reverse:
+            backfill_feed(pk, instance.pk)
+        else:
+            backfill_feed(instance.pk, pk)
@@ -0,0 +1,339 @@
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Exists, Value
+from django.test import TestCase, override_settings
+
+from PIL import Image
+from rest_framework.test import APIClient
+
+from app.core.testing import create_recipe, create_user
+from app.ingredients.models import Ingredient, MeasurementUnit
+from app.tags.models import Tag
+from app.users.models import Sub
+from foodgram_backend import constants
+
+from .image_variants import render_image_variants, save_image_variants
+from .models import Favorite, FeedItem, Recipe, ShoppingCart, ShoppingListItem
+
+
+class UserRecipesTestCase(TestCase):
+    """Общие данные: автор с рецептами и пользователь с клиентом API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.user = create_user('user')
+        unit = MeasurementUnit.objects.create(measurement_unit='г')
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit=unit
+        )
+        cls.sugar = Ingredient.objects.create(
+            name='сахар', measurement_unit=unit
+        )
+        cls.first = create_recipe(
+            cls.author, name='Первый', ingredients=[(cls.salt, 10)]
+        )
+        cls.second = create_recipe(
+            cls.author,
+            name='Второй',
+            ingredients=[(cls.salt, 5), (cls.sugar, 20)],
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertCounters(self, recipe: Recipe, favorites: int, cart: int):
+        """Проверяет счетчики рецепта"""
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, favorites)
+        self.assertEqual(recipe.shopping_cart_count, cart)
+
+    def shopping_list(self) -> dict[str, int]:
+        """Список покупок пользователя: название - количество"""
+        return dict(
+            ShoppingListItem.objects.filter(user=self.user).values_list(
+                'ingredient__name', 'amount'
+            )
+        )
+
+
+class BulkUserRecipesTests(UserRecipesTestCase):
+    """Массовое добавление в избранное и корзину"""
+
+    def test_concurrent_add_of_same_recipe(self):
+        """Рецепт, добавленный параллельным запросом между проверкой и
+        вставкой, пропускается, а не приводит к ошибке"""
+        Favorite.objects.create(user=self.user, recipe=self.first)
+        # Первая проверка не видит связь, добавленную параллельно.
+        stale_check = iter([Value(False)])
+        with mock.patch(
+                'app.recipes.user_recipes.Exists',
+                side_effect=lambda query: next(stale_check, Exists(query)),
+        ):
+            response = self.client.post(
+                '/api/recipes/favorite/',
+                {'recipes': [self.first.pk, self.second.pk]},
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()], [self.second.pk]
+        )
+        self.assertCounters(self.first, favorites=1, cart=0)
+        self.assertCounters(self.second, favorites=1, cart=0)
+
+    def test_bulk_add_updates_counters_and_shopping_list(self):
+        """Массовое добавление увеличивает счетчики и список покупок"""
+        response = self.client.post(
+            '/api/recipes/shopping_cart/',
+            {'recipes': [self.first.pk, self.second.pk]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertCounters(self.first, favorites=0, cart=1)
+        self.assertCounters(self.second, favorites=0, cart=1)
+        self.assertEqual(self.shopping_list(), {'соль': 15, 'сахар': 20})
+
+    def test_bulk_add_of_present_recipes(self):
+        """Уже добавленные рецепты пропускаются"""
+        Favorite.objects.create(user=self.user, recipe=self.first)
+
+        response = self.client.post(
+            '/api/recipes/favorite/',
+            {'recipes': [self.first.pk]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), [])
+        self.assertCounters(self.first, favorites=1, cart=0)
+
+    def test_bulk_remove_updates_counters_and_shopping_list(self):
+        """Массовое удаление уменьшает счетчики и список покупок"""
+        for recipe in (self.first, self.second):
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+
+        response = self.client.delete(
+            '/api/recipes/shopping_cart/',
+            {'recipes': [self.second.pk]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertCounters(self.first, favorites=0, cart=1)
+        self.assertCounters(self.second, favorites=0, cart=0)
+        self.assertEqual(self.shopping_list(), {'соль': 10})
+
+    def test_clear_shopping_cart(self):
+        """Очистка корзины обнуляет счетчики и список покупок"""
+        for recipe in (self.first, self.second):
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user).exists())
+        self.assertCounters(self.first, favorites=0, cart=0)
+        self.assertCounters(self.second, favorites=0, cart=0)
+        self.assertEqual(self.shopping_list(), {})
+
+
+class FeedTests(UserRecipesTestCase):
+    """Лента подписок"""
+
+    def feed(self) -> list[int]:
+        """Id рецептов ленты пользователя по API"""
+        response = self.client.get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_subscribe_backfills_feed(self):
+        """После подписки в ленте рецепты автора, новые сверху"""
+        response = self.client.post(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.feed(), [self.second.pk, self.first.pk])
+
+    def test_new_recipe_fans_out_to_subscribers(self):
+        """Новый рецепт автора попадает в ленты подписчиков"""
+        Sub.objects.create(user=self.user, subscription=self.author)
+
+        recipe = create_recipe(self.author, name='Третий')
+
+        self.assertEqual(self.feed()[0], recipe.pk)
+
+    def test_unsubscribe_prunes_feed(self):
+        """После отписки рецепты автора удаляются только из ленты
+        отписавшегося пользователя"""
+        other = create_user('other')
+        for user in (self.user, other):
+            Sub.objects.create(user=user, subscription=self.author)
+
+        response = self.client.delete(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.feed(), [])
+        self.assertEqual(FeedItem.objects.filter(user=other).count(), 2)
+
+
+class RecipeCacheTests(UserRecipesTestCase):
+    """Сброс кешей рецептов при изменениях вне API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tag = Tag.objects.create(name='Ужин', color='#123456')
+        cls.first.tags.add(cls.tag)
+
+    def get(self, url: str, **params) -> dict:
+        """Ответ API в формате JSON"""
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_anonymous_responses_follow_recipe_edit(self):
+        """Кеш анонимных ответов сбрасывается при изменении рецепта"""
+        self.client.logout()
+        detail_url = f'/api/recipes/{self.first.pk}/'
+        self.get('/api/recipes/')
+        self.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.name = 'Переименованный'
+            self.first.save()
+
+        results = self.get('/api/recipes/')['results']
+        self.assertIn(
+            'Переименованный', [recipe['name'] for recipe in results]
+        )
+        self.assertEqual(self.get(detail_url)['name'], 'Переименованный')
+
+    def test_anonymous_responses_follow_tag_edit(self):
+        """Кеш анонимных ответов сбрасывается при изменении тега"""
+        self.client.logout()
+        detail_url = f'/api/recipes/{self.first.pk}/'
+        self.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = 'Поздний ужин'
+            self.tag.save()
+
+        self.assertEqual(
+            self.get(detail_url)['tags'][0]['name'], 'Поздний ужин'
+        )
+
+    def test_user_marks_follow_changes_outside_api(self):
+        """Признаки и фильтр избранного обновляются после удаления связи
+        в админке и каскадного удаления рецепта"""
+        Favorite.objects.create(user=self.user, recipe=self.first)
+        Favorite.objects.create(user=self.user, recipe=self.second)
+        detail_url = f'/api/recipes/{self.first.pk}/'
+        self.assertIs(self.get(detail_url)['is_favorited'], True)
+        self.assertEqual(
+            self.get('/api/recipes/', is_favorited=1)['count'], 2
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.filter(recipe=self.first).delete()
+            self.second.delete()
+
+        self.assertIs(self.get(detail_url)['is_favorited'], False)
+        self.assertEqual(
+            self.get('/api/recipes/', is_favorited=1)['count'], 0
+        )
+
+
+class ImageVariantsTests(TestCase):
+    """Варианты изображений, сформированные воркером"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = create_recipe(create_user('author'))
+
+    def setUp(self):
+        cache.clear()
+        media = TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        image = BytesIO()
+        Image.new('RGB', (20, 10), 'red').save(image, 'PNG')
+        default_storage.save(self.recipe.image.name, image)
+
+    def test_variants_appear_in_cached_anonymous_responses(self):
+        """Ответы анонимному пользователю, закешированные до обработки
+        изображения, обновляются после сохранения вариантов воркером"""
+        detail_url = f'/api/recipes/{self.recipe.pk}/'
+        self.assertEqual(
+            self.client.get(detail_url).json()['image_variants'], {}
+        )
+        self.client.get('/api/recipes/')
+
+        source = self.recipe.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            save_image_variants(
+                self.recipe.pk, source, render_image_variants(source)
+            )
+
+        for data in (
+            self.client.get(detail_url).json(),
+            self.client.get('/api/recipes/').json()['results'][0],
+        ):
+            self.assertEqual(
+                set(data['image_variants']), set(constants.IMAGE_VARIANTS)
+            )
+
+
+class CascadeDeleteTests(UserRecipesTestCase):
+    """Счетчики и списки покупок после каскадного удаления"""
+
+    def test_user_delete_updates_counters(self):
+        """Удаление пользователя уменьшает счетчики его избранного,
+        корзины и подписок"""
+        Favorite.objects.create(user=self.user, recipe=self.first)
+        ShoppingCart.objects.create(user=self.user, recipe=self.second)
+        Sub.objects.create(user=self.user, subscription=self.author)
+
+        self.user.delete()
+
+        self.assertCounters(self.first, favorites=0, cart=0)
+        self.assertCounters(self.second, favorites=0, cart=0)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
+
+    def test_recipe_delete_updates_author_and_shopping_lists(self):
+        """Удаление рецепта уменьшает счетчик рецептов автора и убирает
+        ингредиенты рецепта из списков покупок"""
+        for recipe in (self.first, self.second):
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+
+        self.second.delete()
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+        self.assertCounters(self.first, favorites=0, cart=1)
+        self.assertEqual(self.shopping_list(), {'соль': 10})
+
+    def test_author_delete_cleans_up_other_users(self):
+        """Удаление автора с рецептами очищает корзины и ленты других
+        пользователей"""
+        Sub.objects.create(user=self.user, subscription=self.author)
+        ShoppingCart.objects.create(user=self.user, recipe=self.first)
+
+        self.author.delete()
+
+        self.assertEqual(self.shopping_list(), {})
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
@@ -2,9 +2,21 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
-from .views import RecipeViewSet
+from app.core.async_views import with_async_reads
+
+from .async_views import recipe_detail, recipe_list
+from .views import RecipeViewSet, ShoppingListExportViewSet
 
 router = DefaultRouter()
+# Регистрируется до рецептов, иначе адрес совпадет с адресом рецепта.
+router.register(
+    'recipes/shopping_cart_exports',
+    ShoppingListExportViewSet,
+    basename='ShoppingListExports',
+)
 router.register('recipes', RecipeViewSet, basename='Recipes')
 
-urlpatterns = [path('', include(router.urls))]
+urlpatterns = [path('', include(with_async_reads(router.urls, {
+    'Recipes-list': recipe_list,
+    'Recipes-detail': recipe_detail,
+})))]
@@ -0,0 +1,110 @@
+from typing import Type
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from rest_framework.exceptions import ValidationError
+
+from app.core.counters import change_counter, delete_without_signals
+from app.core.counts import invalidate_counts
+from app.users.serializers import SHORT_RECIPE_FIELDS
+
+from .cache import invalidate_user_recipe_ids
+from .models import BaseUserRecipeMixin, Recipe, ShoppingCart, ShoppingListItem
+from .shopping_list import change_shopping_list
+
+# Модель связи пользователь - рецепт: избранное или корзина покупок.
+UserRecipeModel = Type[BaseUserRecipeMixin]
+
+
+def user_recipes_changed(model: UserRecipeModel, user_id: int) -> None:
+    """Сбрасывает кеши после массового изменения связей пользователь -
+    рецепт. `bulk_create` и `delete_without_signals` не отправляют
+    сигналы."""
+    invalidate_user_recipe_ids(model, user_id)
+    invalidate_counts(model)
+    if model is ShoppingCart:
+        invalidate_counts(ShoppingListItem)
+
+
+@transaction.atomic
+def add_user_recipes(
+        model: UserRecipeModel,
+        user_id: int,
+        recipe_ids: list[int],
+        retry: bool = True,
+) -> list[Recipe]:
+    """Добавляет рецепты в избранное или корзину пользователя. Рецепты и
+    признак наличия в списке проверяются одним запросом, новые связи
+    сохраняются одним INSERT. Возвращает добавленные рецепты, уже
+    добавленные ранее пропускаются. Если параллельный запрос добавил
+    часть рецептов после проверки, проверка и вставка повторяются."""
+    recipes = list(Recipe.objects.filter(id__in=recipe_ids).only(
+        *SHORT_RECIPE_FIELDS
+    ).annotate(
+        present=Exists(
+            model.objects.filter(user_id=user_id, recipe=OuterRef('pk'))
+        )
+    ))
+    missing = set(recipe_ids) - {recipe.id for recipe in recipes}
+    if missing:
+        raise ValidationError({
+            'recipes': 'Указаны несуществующие рецепты: '
+                       f'{", ".join(map(str, sorted(missing)))}'
+        })
+    added = [recipe for recipe in recipes if not recipe.present]
+    if not added:
+        return []
+    added_ids = [recipe.id for recipe in added]
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [model(user_id=user_id, recipe=recipe) for recipe in added]
+            )
+    except IntegrityError:
+        if not retry:
+            raise
+        return add_user_recipes(model, user_id, recipe_ids, retry=False)
+    change_counter(Recipe, model.counter_field, added_ids)
+    if model is ShoppingCart:
+        change_shopping_list(user_id, added_ids, 1)
+    user_recipes_changed(model, user_id)
+    return added
+
+
+@transaction.atomic
+def remove_user_recipes(
+        model: UserRecipeModel, user_id: int, recipe_ids: list[int]
+) -> None:
+    """Удаляет рецепты из избранного или корзины пользователя одним
+    DELETE. Рецепты, которых нет в списке, пропускаются."""
+    relations = model.objects.filter(
+        user_id=user_id, recipe_id__in=recipe_ids
+    )
+    removed = list(relations.values_list('recipe_id', flat=True))
+    if not removed:
+        return
+    # Без сигналов: список покупок уменьшается ниже одним пересчетом для
+    # всех удаленных рецептов, а не по отдельности.
+    delete_without_signals(relations)
+    change_counter(Recipe, model.counter_field, removed, -1)
+    if model is ShoppingCart:
+        change_shopping_list(user_id, removed, -1)
+    user_recipes_changed(model, user_id)
+
+
+@transaction.atomic
+def clear_shopping_cart(user_id: int) -> None:
+    """Очищает корзину и список покупок пользователя"""
+    change_counter(
+        Recipe,
+        ShoppingCart.counter_field,
+        ShoppingCart.objects.filter(user_id=user_id).values_list(
+            'recipe_id', flat=True
+        ),
+        -1,
+    )
+    delete_without_signals(ShoppingCart.objects.filter(user_id=user_id))
+    # Без обработчиков сигналов: Django удаляет строки одним DELETE.
+    ShoppingListItem.objects.filter(user_id=user_id).delete()
+    user_recipes_changed(ShoppingCart, user_id)
@@ -1,17 +1,19 @@
-from typing import Any, Type
+from typing import Any, Iterable, Type
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models, transaction
+from django.db import transaction
 from django.db.models import Model, QuerySet
-from django.http import HttpResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen.canvas import Canvas
-from rest_framework import status
+from rest_framework import mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import (
     IsAuthenticated,
@@ -19,19 +21,52 @@ from rest_framework.permissions import (
 )
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from app.core.async_views import aiterate
+from app.core.pagination import FoodgramCursorPaginator
 from app.users.serializers import ShortRecipeSerializer
 from foodgram_backend import constants
+from foodgram_backend.db_router import use_primary
 
+from .bulk import bulk_create_recipes
+from .cache import (
+    detail_cache_key,
+    get_cached_response,
+    get_user_recipe_ids,
+    list_cache_key,
+    set_cached_response
+)
+from .exports import enqueue_shopping_list_export
 from .filters import RecipeFilterSet
-from .models import Favorite, Recipe, ShoppingCart
+from .models import (
+    Favorite,
+    FeedItem,
+    Recipe,
+    ShoppingCart,
+    ShoppingListExport
+)
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (
+    CSVShoppingListRenderer,
+    JSONShoppingListRenderer,
+    PDFShoppingListRenderer,
+    PlainTextShoppingListRenderer
+)
 from .serializers import (
     RecipeReadSerializer,
     RecipeWriteSerializer,
+    ShoppingListExportSerializer,
+    ShoppingListItemSerializer,
+    UserRecipeIdsSerializer,
     UserRecipeSerializer
 )
+from .shopping_list import get_shopping_list
+from .user_recipes import (
+    add_user_recipes,
+    clear_shopping_cart,
+    remove_user_recipes
+)
 
 User = get_user_model()
 
@@ -44,27 +79,72 @@ class RecipeViewSet(ModelViewSet):
     http_method_names = ['patch', 'post', 'get', 'delete', 'create']
 
     def get_queryset(self):
-        queryset = Recipe.objects.all().select_related(
+        """Queryset рецептов не зависит от пользователя: признаки
+        `is_favorited` и `is_in_shopping_cart` проставляются после выборки
+        в `mark_user_recipes`"""
+        return Recipe.objects.all().defer('search_vector').select_related(
             'author'
         ).prefetch_related(
-            'tags', 'ingredients', 'favorites', 'shopping_cart'
+            'recipestags_set', 'recipes__ingredient__measurement_unit'
         )
 
-        if self.request.user.is_authenticated:
-            subquery_favorites = Favorite.objects.filter(
-                recipe=models.OuterRef('pk'), user=self.request.user
-            )
-            subquery_shopping_cart = Favorite.objects.filter(
-                recipe=models.OuterRef('pk'), user=self.request.user
-            )
-            return queryset.annotate(
-                is_favorited=models.Exists(subquery_favorites),
-                is_in_shopping_cart=models.Exists(subquery_shopping_cart),
-            )
+    def mark_user_recipes(self, recipes: Iterable[Recipe]) -> None:
+        """Проставляет рецептам признаки наличия в избранном и корзине
+        покупок текущего пользователя"""
+        user = self.request.user
+        favorites = shopping_cart = set()
+        if user.is_authenticated:
+            favorites = get_user_recipe_ids(Favorite, user.pk)
+            shopping_cart = get_user_recipe_ids(ShoppingCart, user.pk)
+        for recipe in recipes:
+            recipe.is_favorited = recipe.pk in favorites
+            recipe.is_in_shopping_cart = recipe.pk in shopping_cart
+
+    def paginate_queryset(self, queryset: QuerySet) -> list[Recipe] | None:
+        """Страница рецептов с признаками избранного и корзины"""
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.mark_user_recipes(page)
+        return page
+
+    def get_object(self) -> Recipe:
+        """Рецепт с признаками избранного и корзины"""
+        recipe = super().get_object()
+        self.mark_user_recipes([recipe])
+        return recipe
 
-        return queryset.annotate(
-            is_favorited=models.Value(False),
-            is_in_shopping_cart=models.Value(False),
+    def cached_response(self, key: str, view, *args: Any, **kwargs: Any):
+        """Отдает анонимному пользователю отрендеренный ответ из кеша, при
+        отсутствии ответа в кеше формирует его и сохраняет в кеш"""
+        renderer = self.request.accepted_renderer
+        if (
+            self.request.user.is_authenticated
+            or renderer.format != 'json'
+        ):
+            return view(self.request, *args, **kwargs)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        if (content := get_cached_response(key)) is not None:
+            return HttpResponse(content, content_type=content_type)
+        # Общий кеш заполняется с основной базы данных: отстающая реплика
+        # сохранила бы в него устаревший ответ под новой версией ключа.
+        with use_primary():
+            response = view(self.request, *args, **kwargs)
+        content = renderer.render(response.data)
+        set_cached_response(key, content)
+        return HttpResponse(content, content_type=content_type)
+
+    def list(self, request: Request, *args: Any, **kwargs: Any):
+        """Список рецептов. Для анонимных пользователей кешируется."""
+        return self.cached_response(
+            list_cache_key(request), super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any):
+        """Рецепт. Для анонимных пользователей кешируется."""
+        return self.cached_response(
+            detail_cache_key(kwargs['pk']), super().retrieve, *args, **kwargs
         )
 
     def get_serializer_class(self):
@@ -83,7 +163,9 @@ class RecipeViewSet(ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         instance = self.perform_create(serializer)
-        instance_serializer = RecipeReadSerializer(instance)
+        instance_serializer = RecipeReadSerializer(
+            instance, context=self.get_serializer_context()
+        )
         return Response(
             instance_serializer.data,
             status=status.HTTP_201_CREATED,
@@ -95,7 +177,11 @@ class RecipeViewSet(ModelViewSet):
         serializer = self.get_serializer(instance=instance, data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
-        instance_serializer = RecipeReadSerializer(instance)
+        # Сбрасываем предзагруженные теги и ингредиенты, они изменились.
+        instance._prefetched_objects_cache = {}
+        instance_serializer = RecipeReadSerializer(
+            instance, context=self.get_serializer_context()
+        )
         return Response(
             instance_serializer.data,
             status=status.HTTP_200_OK,
@@ -141,6 +227,68 @@ class RecipeViewSet(ModelViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        url_path='feed',
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+    )
+    def feed(self, request: Request) -> Response:
+        """Лента рецептов авторов, на которых подписан пользователь.
+        Страница выбирается из таблицы лент по курсору (`?cursor=`), затем
+        рецепты страницы загружаются по id."""
+        paginator = FoodgramCursorPaginator()
+        paginator.ordering = FeedItem._meta.ordering
+        page = paginator.paginate_queryset(
+            FeedItem.objects.filter(user=request.user).only(
+                'recipe_id', 'published'
+            ),
+            request,
+            view=self,
+        )
+        recipes = self.get_queryset().in_bulk(
+            [item.recipe_id for item in page]
+        )
+        recipes = [
+            recipes[item.recipe_id] for item in page
+            if item.recipe_id in recipes
+        ]
+        self.mark_user_recipes(recipes)
+        serializer = RecipeReadSerializer(
+            recipes, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        url_path='bulk',
+        methods=['post'],
+        permission_classes=[IsAuthenticated],
+    )
+    def bulk(self, request: Request) -> Response:
+        """Массовое создание рецептов текущего пользователя. Принимает
+        список рецептов в формате `POST /api/recipes/`, создает рецепты без
+        ошибок и возвращает ошибки остальных по индексу в списке."""
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {'errors': 'Ожидается непустой список рецептов'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > constants.RECIPES_BULK_MAX_ITEMS:
+            return Response(
+                {'errors': 'Количество рецептов не должно превышать '
+                           f'{constants.RECIPES_BULK_MAX_ITEMS}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = bulk_create_recipes(request.data, request.user)
+        return Response(
+            result,
+            status=(
+                status.HTTP_201_CREATED if result['created']
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
     @action(
         detail=True,
         url_path='favorite',
@@ -175,51 +323,138 @@ class RecipeViewSet(ModelViewSet):
                 ShoppingCart, request.user, pk
             )
 
+    def bulk_user_recipes(
+            self, request: Request, model: Type[Model]
+    ) -> Response:
+        """Массово добавляет (POST) или удаляет (DELETE) рецепты из списка
+        `recipes` в избранном или корзине покупок текущего пользователя"""
+        serializer = UserRecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'DELETE':
+            remove_user_recipes(model, request.user.pk, recipe_ids)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        added = add_user_recipes(model, request.user.pk, recipe_ids)
+        return Response(
+            ShortRecipeSerializer(
+                added, many=True, context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(
         detail=False,
-        url_path='download_shopping_cart',
+        url_path='favorite',
+        url_name='favorite-bulk',
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_bulk(self, request: Request) -> Response:
+        """Массовое добавление/удаление избранного"""
+        return self.bulk_user_recipes(request, Favorite)
+
+    @action(
+        detail=False,
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_bulk(self, request: Request) -> Response:
+        """Массовое добавление/удаление из корзины покупок"""
+        return self.bulk_user_recipes(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        url_path='shopping_cart/clear',
+        methods=['delete'],
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_clear(self, request: Request) -> Response:
+        """Очистка корзины покупок"""
+        clear_shopping_cart(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(
+        detail=False,
+        url_path='shopping_list',
         methods=['get'],
         permission_classes=[IsAuthenticated]
     )
+    def shopping_list(self, request: Request):
+        """Список покупок: ингредиенты рецептов из корзины с суммарным
+        количеством"""
+        serializer = ShoppingListItemSerializer(
+            get_shopping_list(request.user.pk), many=True
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        url_path='download_shopping_cart',
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            PDFShoppingListRenderer,
+            JSONShoppingListRenderer,
+            CSVShoppingListRenderer,
+            PlainTextShoppingListRenderer,
+        ],
+    )
     def download_shopping_cart(self, request: Request):
-        """Генерирует pdf документ и отдает пользователю"""
-        my_ingredients = ShoppingCart.objects.filter(
-            user=request.user,
-        ).values('recipe__ingredients').annotate(
-            total_amount=models.Sum('recipe__recipes__amount'),
-            ingredient=models.F('recipe__ingredients__name'),
-            measurement_unit=models.F(
-                'recipe__ingredients__measurement_unit__measurement_unit'
-            ),
-        ).values_list(
-            'ingredient',
-            'total_amount',
+        """Отдает список покупок документом в формате, выбранном по
+        заголовку `Accept` или параметру `?format=` (pdf, json, csv, txt).
+        По умолчанию pdf. Строки читаются серверным курсором, документ
+        передается потоково, в режиме ASGI - асинхронным итератором."""
+        renderer = request.accepted_renderer
+        rows = get_shopping_list(request.user.pk).values_list(
+            'ingredient_id',
+            'name',
+            'amount',
             'measurement_unit',
+        ).iterator(chunk_size=constants.SHOPPING_LIST_CHUNK_SIZE)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        content = renderer.stream(rows)
+        if settings.ASYNC_READ_VIEWS:
+            content = aiterate(content, constants.SHOPPING_LIST_CHUNK_SIZE)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="file.{renderer.format}"'
         )
-        return generate_pdf_response(my_ingredients)
+        return response
 
 
-def generate_pdf_response(ingredients: QuerySet) -> HttpResponse:
-    pdfmetrics.registerFont(TTFont(
-        constants.PDF_FONT_NAME,
-        constants.PDF_FONT_DIR / constants.PDF_FONT_FILE
-    ))
-    buffer = HttpResponse(content_type='application/pdf')
-    buffer['Content-Disposition'] = 'attachment; filename="file.pdf"'
-    canvas = Canvas(buffer)
-    canvas.setFont(constants.PDF_FONT_NAME, constants.PDF_TITLE_FONT_SIZE)
-    canvas.drawCentredString(
-        A4[0] / 2, A4[1] - constants.PDF_INDENT, 'Список покупок:'
-    )
-    canvas.setFont(constants.PDF_FONT_NAME, constants.PDF_TEXT_FONT_SIZE)
-    for index, ingredient in enumerate(ingredients):
-        canvas.drawString(
-            constants.PDF_INDENT,
-            A4[1] - constants.PDF_INDENT - (
-                constants.PDF_TEXT_FONT_SIZE + constants.PDF_GAP
-            )
-            * (index + 1), (
-                f'{ingredient[0]} {ingredient[1]} {ingredient[2]}'
-            ))
-    canvas.save()
-    return buffer
+class ShoppingListExportViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet
+):
+    """Асинхронная выгрузка списка покупок в pdf. POST ставит задание в
+    очередь и возвращает его id, GET возвращает статус задания, `download`
+    отдает готовый документ."""
+    serializer_class = ShoppingListExportSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ShoppingListExport.objects.filter(user=self.request.user)
+
+    def create(self, request: Request, *args: Any, **kwargs: Any):
+        """Ставит в очередь формирование документа"""
+        job = enqueue_shopping_list_export(request.user.pk)
+        serializer = self.get_serializer(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request: Request, pk: int):
+        """Отдает готовый документ"""
+        job = self.get_object()
+        if job.status != ShoppingListExport.Status.DONE:
+            raise Http404('Документ еще не сформирован')
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename='file.pdf',
+            content_type='application/pdf',
+        )
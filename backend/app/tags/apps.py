@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class TagsConfig(AppConfig):
+    name = 'app.tags'
+
+    def ready(self):
+        from . import signals  # noqa: F401
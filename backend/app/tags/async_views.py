@@ -0,0 +1,26 @@
+from django.http import HttpRequest, HttpResponse
+
+from asgiref.sync import sync_to_async
+
+from app.core.async_views import catalog_response
+from app.core.catalog import TAGS
+
+from .registry import get_tag_registry
+
+
+async def tag_list(request: HttpRequest) -> HttpResponse | None:
+    """Асинхронный список тегов из справочника в памяти процесса"""
+    return await catalog_response(
+        request, TAGS, sync_to_async(lambda: get_tag_registry().data)
+    )
+
+
+async def tag_detail(request: HttpRequest, pk: str) -> HttpResponse | None:
+    """Асинхронный тег из справочника в памяти процесса"""
+    def get_data() -> dict | None:
+        try:
+            return get_tag_registry().data_by_id.get(int(pk))
+        except ValueError:
+            return None
+
+    return await catalog_response(request, TAGS, sync_to_async(get_data))
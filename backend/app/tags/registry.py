@@ -0,0 +1,66 @@
+from typing import Iterable
+
+from rest_framework import serializers
+
+from app.core.catalog import TAGS, get_catalog_version
+from foodgram_backend.db_router import use_primary
+
+from .models import Tag
+from .serializers import TagSerializer
+
+
+class TagRegistry:
+    """Справочник тегов в памяти процесса: теги и их сериализованное
+    представление с доступом по id и по слагу"""
+
+    def __init__(self, tags: Iterable[Tag]):
+        self.tags = list(tags)
+        self.data = TagSerializer(self.tags, many=True).data
+        self.by_id = {tag.id: tag for tag in self.tags}
+        self.id_by_slug = {tag.slug: tag.id for tag in self.tags}
+        self.data_by_id = {item['id']: item for item in self.data}
+        self.position = {tag.id: index for index, tag in enumerate(self.tags)}
+
+    def serialize(self, tag_ids: Iterable[int]) -> list[dict]:
+        """Сериализованные теги в порядке справочника"""
+        return [
+            self.data_by_id[tag_id]
+            for tag_id in sorted(tag_ids, key=self.position.__getitem__)
+        ]
+
+
+_registry: TagRegistry | None = None
+_registry_version: float | None = None
+
+
+def get_tag_registry() -> TagRegistry:
+    """Справочник тегов текущего процесса. Перечитывается с основной базы
+    данных, если теги изменились после его построения: отстающая реплика
+    вернула бы старые теги под новой версией."""
+    global _registry, _registry_version
+    version = get_catalog_version(TAGS)
+    if _registry is None or _registry_version != version:
+        with use_primary():
+            _registry = TagRegistry(Tag.objects.all())
+        _registry_version = version
+    return _registry
+
+
+class TagPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле тега по id, которое проверяет тег по справочнику в памяти
+    вместо запроса к базе данных"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Tag.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data) -> Tag:
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            tag = get_tag_registry().by_id.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return tag
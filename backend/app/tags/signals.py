@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app.core.catalog import TAGS, bump_catalog_version
+
+from .models import Tag
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tags_changed(sender, **kwargs):
+    """Обновляет версию справочника тегов"""
+    bump_catalog_version(TAGS)
@@ -2,9 +2,15 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from app.core.async_views import with_async_reads
+
+from .async_views import tag_detail, tag_list
 from .views import TagViewSet
 
 router = DefaultRouter()
 router.register('tags', TagViewSet, basename='Tags')
 
-urlpatterns = [path('', include(router.urls))]
+urlpatterns = [path('', include(with_async_reads(router.urls, {
+    'Tags-list': tag_list,
+    'Tags-detail': tag_detail,
+})))]
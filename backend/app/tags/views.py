@@ -1,14 +1,35 @@
+from typing import Any
+
+from django.http import Http404
+
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from app.core.catalog import TAGS, catalog_condition
+
 from .models import Tag
+from .registry import get_tag_registry
 from .serializers import TagSerializer
 
 
 class TagViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
-    """Вьюсет тегов"""
+    """Вьюсет тегов. Отдает теги из справочника в памяти процесса и
+    поддерживает условные запросы по версии справочника тегов."""
     permission_classes = [AllowAny]
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
     pagination_class = None
+
+    @catalog_condition(TAGS)
+    def list(self, request: Request, *args: Any, **kwargs: Any):
+        return Response(get_tag_registry().data)
+
+    @catalog_condition(TAGS)
+    def retrieve(self, request: Request, pk: str, *args: Any, **kwargs: Any):
+        try:
+            return Response(get_tag_registry().data_by_id[int(pk)])
+        except (KeyError, ValueError):
+            raise Http404
@@ -8,7 +8,10 @@ class UserAdmin(UserAdminClass):
     """Настройки отображения модели пользователя в админ панели"""
     list_filter = ('username', 'email')
     search_fields = ('username', 'email')
-    list_display = ('username', 'first_name', 'last_name', 'email')
+    list_display = (
+        'username', 'first_name', 'last_name', 'email', 'recipes_count',
+        'subscribers_count',
+    )
     list_display_links = ('username', 'first_name', 'last_name', 'email')
 
 
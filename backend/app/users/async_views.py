@@ -0,0 +1,23 @@
+from django.http import HttpRequest, HttpResponse
+
+from app.core.async_views import drf_request, json_response
+from app.core.pagination import apaginate
+
+from .serializers import UserWithRecipeSerializer, aload_subscription_ids
+from .views import subscriptions_queryset
+
+
+async def subscriptions(request: HttpRequest) -> HttpResponse | None:
+    """Асинхронный список подписок текущего пользователя"""
+    if not request.user.is_authenticated:
+        return None
+    wrapped = drf_request(request)
+    paginator = await apaginate(subscriptions_queryset(wrapped), wrapped)
+    if paginator is None:
+        return None
+    await aload_subscription_ids(wrapped)
+    serializer = UserWithRecipeSerializer(
+        instance=paginator.page, many=True, context={'request': wrapped}
+    )
+    response = paginator.get_paginated_response(serializer.data)
+    return json_response(response.data)
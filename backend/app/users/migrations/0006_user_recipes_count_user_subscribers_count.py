@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:56
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    """Подзапрос количества записей `model`, ссылающихся полем `field` на
+    обновляемую запись"""
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')}).values(
+                field
+            ).annotate(total=models.Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счетчики пользователей по текущим данным"""
+    User = apps.get_model('users', 'User')
+    User.objects.update(
+        recipes_count=count_related(
+            apps.get_model('recipes', 'Recipe'), 'author'
+        ),
+        subscribers_count=count_related(
+            apps.get_model('users', 'Sub'), 'subscription'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_favorites_count_recipe_shopping_cart_count'),
+        ('users', '0005_user_unique_username_user_unique_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
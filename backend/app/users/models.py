@@ -3,12 +3,14 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
 
-from app.core.models import BaseModelMixin
+from app.core.models import BaseModelMixin, CounterFieldsMixin
 from foodgram_backend import constants
 
 
-class User(AbstractUser, BaseModelMixin):
+class User(CounterFieldsMixin, AbstractUser, BaseModelMixin):
     """Модель пользователя"""
+    counter_fields = ('recipes_count', 'subscribers_count')
+
     email = models.EmailField(
         verbose_name='Почта',
         null=False,
@@ -43,6 +45,18 @@ class User(AbstractUser, BaseModelMixin):
         verbose_name='Подписки',
         through='Sub',
     )
+    # Денормализованные счетчики, изменяются через `change_counter`
+    # (см. `signals.py`), пересчитываются командой `repair_counters`.
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -5,25 +5,90 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db.models import Count
+from django.db.models import Prefetch
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
 from rest_framework.validators import UniqueValidator
 
+from app.recipes.fields import ImageVariantsField
 from app.recipes.models import Recipe
 
 from .models import Sub
 
 User = get_user_model()
 
+# Поля модели рецепта, необходимые `ShortRecipeSerializer`.
+SHORT_RECIPE_FIELDS = (
+    'id', 'name', 'image', 'cooking_time', 'image_variants',
+    'image_variants_source',
+)
+
+
+def get_subscription_ids(request: Request) -> set[int]:
+    """Возвращает id пользователей, на которых подписан текущий
+    пользователь. Загружаются одним запросом и запоминаются на время
+    запроса, чтобы все вложенные сериализаторы пользователей использовали
+    один и тот же результат."""
+    if not hasattr(request, 'subscription_ids'):
+        request.subscription_ids = set(
+            request.user.subs.values_list('subscription_id', flat=True)
+        )
+    return request.subscription_ids
+
+
+async def aload_subscription_ids(request: Request) -> None:
+    """Асинхронно загружает id подписок текущего пользователя для
+    `get_subscription_ids`: в асинхронном обработчике сериализаторы не
+    могут выполнять запросы к базе данных."""
+    if request.user.is_authenticated and not hasattr(
+        request, 'subscription_ids'
+    ):
+        request.subscription_ids = {
+            user_id async for user_id in request.user.subs.values_list(
+                'subscription_id', flat=True
+            )
+        }
+
+
+def get_recipes_limit(request: Request) -> int | None:
+    """Возвращает ограничение количества рецептов автора из параметра
+    запроса `recipes_limit`"""
+    recipes_limit = request.query_params.get('recipes_limit')
+    if not recipes_limit:
+        return None
+    try:
+        recipes_limit = int(recipes_limit)
+    except ValueError:
+        recipes_limit = -1
+    if recipes_limit < 0:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Должно быть неотрицательным числом'}
+        )
+    return recipes_limit
+
+
+def author_recipes_prefetch(request: Request) -> Prefetch:
+    """Предзагрузка рецептов авторов в атрибут `limited_recipes`.
+    При указанном `recipes_limit` берется не больше `recipes_limit` рецептов
+    каждого автора одним запросом с `ROW_NUMBER() OVER (PARTITION BY
+    author_id)`. Загружаются только поля `ShortRecipeSerializer`."""
+    recipes = Recipe.objects.only(*SHORT_RECIPE_FIELDS, 'author')
+    recipes_limit = get_recipes_limit(request)
+    if recipes_limit is not None:
+        recipes = recipes[:recipes_limit]
+    return Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор короткого представления рецептов (без тегов и
     ингредиентов)"""
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'cooking_time', 'image_variants')
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -46,9 +111,7 @@ class UserSerializer(serializers.ModelSerializer):
         пользователя"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return (
-                request.user.subs.filter(subscription=obj.id).exists()
-            )
+            return obj.id in get_subscription_ids(request)
         return False
 
 
@@ -76,26 +139,20 @@ class UserWithRecipeSerializer(serializers.ModelSerializer):
         пользователя"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return (
-                request.user.subs.filter(subscription=obj.id).exists()
-            )
+            return obj.id in get_subscription_ids(request)
         return False
 
     def get_recipes(self, obj: User):
         """Метод для получения списка рецептов пользователя с ограничением
-        по количеству"""
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.recipes.all().prefetch_related(
-            'tags', 'ingredients',
-        )
-        if recipes_limit:
-            try:
-                recipes = recipes[:int(recipes_limit)]
-            except ValueError:
-                raise serializers.ValidationError(
-                    {'recipes_limit': 'Должно быть числом'}
-                )
+        по количеству. Если рецепты предзагружены в `limited_recipes`
+        (см. `author_recipes_prefetch`), запросов к базе данных нет."""
+        recipes = getattr(obj, 'limited_recipes', None)
+        if recipes is None:
+            request = self.context.get('request')
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(request)
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         serializer = ShortRecipeSerializer(
             instance=recipes, many=True, read_only=True
         )
@@ -186,15 +243,7 @@ class UserSubscriptionSerializer(serializers.Serializer):
     user = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all())
 
-    sub = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all().annotate(
-            recipes_count=Count('recipes')
-        ).prefetch_related('recipes',))
-
-    def to_representation(self, instance):
-        return UserWithRecipeSerializer(
-            instance['sub'], context={'request': self.context.get('request')}
-        ).data
+    sub = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
 
     def validate(self, attrs):
         operation = self.context.get('operation')
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from app.core.counters import change_counter
+from app.core.signals import track_counts
+
+from .models import Sub
+
+User = get_user_model()
+
+# Таблицы списков пользователей и подписок.
+track_counts(User, Sub)
+
+
+@receiver(post_save, sender=Sub)
+def subscription_created(sender, instance: Sub, created: bool, **kwargs):
+    """Увеличивает счетчик подписчиков автора"""
+    if created:
+        change_counter(User, 'subscribers_count', [instance.subscription_id])
+
+
+@receiver(post_delete, sender=Sub)
+def subscription_deleted(sender, instance: Sub, **kwargs):
+    """Уменьшает счетчик подписчиков автора"""
+    change_counter(
+        User, 'subscribers_count', [instance.subscription_id], -1
+    )
+
+
+@receiver(m2m_changed, sender=Sub)
+def subscriptions_added(sender, instance: User, action: str, reverse: bool,
+                        pk_set: set[int] | None, **kwargs):
+    """Увеличивает счетчики подписчиков при добавлении подписок через
+    `user.subscriptions.add()` или `user.users.add()`, которые не
+    отправляют `post_save`. При удалении через `remove()` и `clear()`
+    записи `Sub` удаляются с отправкой `post_delete`."""
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        change_counter(
+            User, 'subscribers_count', [instance.pk], len(pk_set)
+        )
+    else:
+        change_counter(User, 'subscribers_count', pk_set)
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from .models import Sub
+
+User = get_user_model()
+
+
+class SubscribeTests(TestCase):
+    """Подписка на автора и отписка от него"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        cls.other_reader = User.objects.create_user(
+            username='other', email='other@example.com', password='pass'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_unsubscribe_keeps_other_users_subscriptions(self):
+        """Отписка удаляет только подписку текущего пользователя"""
+        Sub.objects.create(user=self.reader, subscription=self.author)
+        Sub.objects.create(user=self.other_reader, subscription=self.author)
+
+        response = self.client.delete(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            Sub.objects.filter(
+                user=self.reader, subscription=self.author
+            ).exists()
+        )
+        self.assertTrue(
+            Sub.objects.filter(
+                user=self.other_reader, subscription=self.author
+            ).exists()
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
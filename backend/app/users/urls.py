@@ -2,14 +2,21 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from app.core.async_views import with_async_reads
+
+from .async_views import subscriptions
 from .views import Subscribe, Subscriptions, UserViewSet
 
 router = DefaultRouter()
 router.register('users', UserViewSet, basename='Users')
 
-urlpatterns = [
+urlpatterns = with_async_reads([
     path('users/<int:pk>/subscribe/', Subscribe.as_view()),
-    path('users/subscriptions/', Subscriptions.as_view()),
+    path(
+        'users/subscriptions/',
+        Subscriptions.as_view(),
+        name='Subscriptions',
+    ),
     path('', include(router.urls)),
 
-]
+], {'Subscriptions': subscriptions})
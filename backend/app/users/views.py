@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db.models import F, QuerySet
 from django.shortcuts import get_object_or_404
 
 from rest_framework import mixins, status
@@ -17,7 +17,8 @@ from .serializers import (
     UserCreateSerializer,
     UserSerializer,
     UserSubscriptionSerializer,
-    UserWithRecipeSerializer
+    UserWithRecipeSerializer,
+    author_recipes_prefetch
 )
 
 User = get_user_model()
@@ -30,9 +31,7 @@ class UserViewSet(
     GenericViewSet
 ):
     """Всьюсет для работы с моделью пользователя"""
-    queryset = User.objects.all().prefetch_related(
-        'recipes', 'recipes__ingredients', 'recipes__tags'
-    )
+    queryset = User.objects.all()
     permission_classes = [AllowAny]
 
     def get_serializer_class(self):
@@ -76,10 +75,8 @@ class Subscribe(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request: Request, pk: int, format=None):
-        sub = get_object_or_404(User.objects.all().annotate(
-            recipes_count=Count('recipes')
-        ).prefetch_related(
-            'recipes', 'recipes__ingredients', 'recipes__tags',
+        sub = get_object_or_404(User.objects.all().prefetch_related(
+            author_recipes_prefetch(request)
         ), pk=pk)
 
         subscription = {
@@ -93,6 +90,9 @@ class Subscribe(APIView):
         )
         serializer.is_valid(raise_exception=True)
         request.user.subscriptions.add(sub)
+        serializer = UserWithRecipeSerializer(
+            instance=sub, context={'request': request}
+        )
         return Response(serializer.data, status.HTTP_201_CREATED)
 
     def delete(self, request: Request, pk: int, format=None):
@@ -109,22 +109,29 @@ class Subscribe(APIView):
         )
         serializer.is_valid(raise_exception=True)
         request.user.subscriptions.through.objects.filter(
-            subscription=sub
+            user=request.user, subscription=sub
         ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def subscriptions_queryset(request: Request) -> QuerySet:
+    """Авторы, на которых подписан текущий пользователь, с их рецептами"""
+    return User.objects.filter(
+        users_subs__user=request.user
+    ).annotate(
+        sub_id=F('users_subs__id'),
+    ).prefetch_related(
+        author_recipes_prefetch(request)
+    ).order_by('id')
+
+
 class Subscriptions(APIView, FoodgramPaginator):
     permission_classes = [IsAuthenticated]
+    # Для пагинации по курсору подписки упорядочены по id записи Sub.
+    cursor_ordering = ('sub_id',)
 
     def get(self, request: Request, format=None):
-        query_set = request.user.subscriptions.all().annotate(
-            recipes_count=Count('recipes')
-        ).prefetch_related(
-            'recipes', 'recipes__ingredients', 'recipes__tags',
-        )
-
-        page = self.paginate_queryset(query_set, request)
+        page = self.paginate_queryset(subscriptions_queryset(request), request)
         serializer = UserWithRecipeSerializer(
             instance=page, many=True, context={'request': request}
         )
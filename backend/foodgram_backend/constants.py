@@ -17,6 +17,10 @@ PDF_INDENT = 72
 PDF_TITLE_FONT_SIZE = 15
 PDF_TEXT_FONT_SIZE = 12
 PDF_GAP = 3
+PDF_AMOUNT_COLUMN_WIDTH = 90
+PDF_UNIT_COLUMN_WIDTH = 80
+# Размер части pdf документа при потоковой передаче (в байтах).
+PDF_CHUNK_SIZE = 64 * 1024
 
 # Настройка пагинации по умолчанию.
 
@@ -25,3 +29,128 @@ DEFAULT_PAGINATION_PAGE_SIZE = 20
 # Настройка валидации сериализатора рецептов.
 MIN_INGREDIENT_AMOUNT = 1
 MIN_COOKING_TIME = 1
+
+# Настройка контроля количества запросов к базе данных.
+QUERY_BUDGET_DEFAULT_MAX_QUERIES = 30
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 5
+
+# Максимальное количество записей локального и файлового кеша. При
+# превышении удаляется треть записей.
+CACHE_MAX_ENTRIES = 10_000
+
+# Время жизни кеша рецептов для анонимных пользователей (в секундах).
+RECIPES_CACHE_TIMEOUT = 60 * 10
+
+# Время жизни кеша избранного и корзины пользователя (в секундах).
+USER_RECIPES_CACHE_TIMEOUT = 60 * 10
+
+# Настройка кеша количества записей в пагинации.
+COUNT_CACHE_TIMEOUT = 60 * 5
+# Для таблиц больше этого размера количество записей без фильтров берется
+# из статистики Postgres.
+APPROXIMATE_COUNT_THRESHOLD = 100_000
+
+# Настройка воркера выгрузки списков покупок.
+# Пауза между проверками очереди, если заданий нет (в секундах).
+EXPORT_WORKER_POLL_INTERVAL = 2
+# Через сколько секунд задание в статусе "Формируется" выдается повторно.
+EXPORT_PROCESSING_TIMEOUT = 60 * 5
+# Через сколько секунд готовые задания и задания с ошибкой удаляются
+# вместе с файлами, на которые больше не ссылаются другие задания.
+# Файл переиспользуется для нового задания, только если он сформирован
+# не раньше половины этого срока.
+EXPORT_TTL = 60 * 60 * 24
+# Пауза между удалениями устаревших заданий воркером (в секундах).
+EXPORT_CLEANUP_INTERVAL = 60 * 60
+
+# Количество строк списка покупок, читаемых из базы данных за один раз
+# при потоковой выгрузке.
+SHOPPING_LIST_CHUNK_SIZE = 500
+
+# Настройка загрузки изображений рецептов в base64.
+# Максимальный размер изображения после декодирования (в байтах).
+IMAGE_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+# Запас размера тела запроса сверх изображения на остальные поля рецепта.
+DATA_UPLOAD_EXTRA_SIZE = 256 * 1024
+# Размер, до которого изображение держится в памяти, затем на диске.
+IMAGE_SPOOL_MAX_MEMORY_SIZE = 256 * 1024
+# Размер части base64 строки, декодируемой за раз (кратен 4).
+IMAGE_DECODE_CHUNK_SIZE = 64 * 1024
+# Максимальные ширина и высота изображения (в пикселях).
+IMAGE_MAX_WIDTH = 6000
+IMAGE_MAX_HEIGHT = 6000
+
+# Варианты изображения рецепта: название - (максимальные ширина и высота,
+# обрезать ли изображение до точного размера).
+IMAGE_VARIANTS = {
+    'card': ((480, 480), False),
+    'detail': ((1200, 1200), False),
+    'thumbnail': ((100, 100), True),
+}
+# Форматы вариантов изображения: расширение файла - формат Pillow.
+IMAGE_VARIANT_FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+IMAGE_VARIANT_QUALITY = 80
+# Каталог вариантов изображений в хранилище медиафайлов.
+IMAGE_VARIANTS_DIR = 'variants'
+# Настройка воркера вариантов изображений.
+# Пауза между проверками очереди, если изображений нет (в секундах).
+IMAGE_WORKER_POLL_INTERVAL = 2
+# Количество рецептов, выбираемых из очереди за раз.
+IMAGE_WORKER_BATCH_SIZE = 32
+
+# Настройка массового создания рецептов.
+# Максимальное количество рецептов в одном запросе `POST /api/recipes/bulk/`
+# и в одной транзакции команды `import_recipes`.
+RECIPES_BULK_MAX_ITEMS = 100
+# Количество строк в одном INSERT при массовом создании.
+RECIPES_BULK_BATCH_SIZE = 500
+
+# Настройка загрузки справочника ингредиентов.
+# Количество ингредиентов, сохраняемых за один INSERT.
+INGREDIENTS_LOAD_BATCH_SIZE = 1000
+# Размер части json файла, читаемой за раз (в символах).
+INGREDIENTS_READ_CHUNK_SIZE = 64 * 1024
+
+# Максимальное количество рецептов в одном запросе массового добавления в
+# избранное или корзину покупок и удаления из них.
+USER_RECIPES_BULK_MAX_ITEMS = 500
+
+# Количество записей, пересчитываемых за один UPDATE командой
+# `repair_counters`.
+REPAIR_COUNTERS_BATCH_SIZE = 1000
+
+# Настройка ленты подписок.
+# Сколько последних рецептов автора добавляется в ленту при подписке.
+FEED_BACKFILL_LIMIT = 500
+# Количество записей ленты в одном INSERT.
+FEED_BATCH_SIZE = 1000
+
+# Сколько секунд после изменяющего запроса чтение клиента идет с основной
+# базы данных, а не с реплики. Должно превышать типичное отставание реплики.
+DB_REPLICA_PIN_SECONDS = 5
+
+# Максимальное время жизни постоянного соединения с базой данных (секунд).
+# Соединение закрывается после завершения запроса, в котором истекло.
+DB_CONN_MAX_AGE = 60 * 10
+# То же в режиме ASGI (0 - новое соединение на каждый запрос).
+ASGI_DB_CONN_MAX_AGE = 0
+# Соединения с базой данных сверх пула воркеров gunicorn: миграции,
+# команды управления, подключения администраторов.
+DB_RESERVED_CONNECTIONS = 5
+
+# Параметры команды `benchmark_reads` по умолчанию.
+# Порт и количество воркеров запускаемого для замера gunicorn.
+BENCHMARK_PORT = 8001
+BENCHMARK_WORKERS = 2
+# Количество запросов к каждому эндпоинту и одновременных запросов.
+BENCHMARK_REQUESTS = 1000
+BENCHMARK_CONCURRENCY = 50
+# Время ожидания ответа, после которого запрос считается ошибкой (секунд).
+BENCHMARK_REQUEST_TIMEOUT = 10
+# Пауза между заголовками медленного клиента (секунд).
+BENCHMARK_SLOW_CLIENT_INTERVAL = 1
+# Сколько секунд ждать запуска gunicorn.
+BENCHMARK_STARTUP_TIMEOUT = 30
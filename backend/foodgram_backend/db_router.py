@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+
+# Признак того, что чтение в текущем запросе можно выполнять с реплики.
+# Устанавливается `ReplicaRoutingMiddleware`, вне HTTP запросов (команды,
+# воркеры) чтение всегда идет с основной базы данных.
+read_from_replica: ContextVar[bool] = ContextVar(
+    'read_from_replica', default=False
+)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Выполняет чтение внутри блока с основной базы данных, даже если
+    запрос направлен на реплику"""
+    token = read_from_replica.set(False)
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Направляет чтение на реплику, если это разрешено для текущего
+    запроса, а запись и миграции - на основную базу данных"""
+
+    def db_for_read(self, model, **hints):
+        if read_from_replica.get():
+            return settings.DATABASE_REPLICA['ALIAS']
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная база данных.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
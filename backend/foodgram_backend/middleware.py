@@ -0,0 +1,223 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from foodgram_backend.db_router import read_from_replica
+
+logger = logging.getLogger(__name__)
+
+# Списки параметров `IN (%s, %s, ...)` разной длины считаем одной формой
+# запроса, иначе prefetch для разных страниц дает разные "формы".
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    """Превышен бюджет запросов к базе данных для эндпоинта"""
+
+
+class QueryCollector:
+    """Собирает статистику SQL запросов, выполненных в рамках одного
+    HTTP запроса"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка для `connection.execute_wrapper`"""
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.monotonic() - start
+            self.count += 1
+            self.shapes[IN_LIST_RE.sub('IN (...)', sql)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Возвращает формы запросов, повторившиеся не меньше `threshold`
+        раз (признак N+1)"""
+        return [
+            (sql, count) for sql, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+# Сборщик статистики текущего HTTP запроса. Переменная контекста
+# передается в потоки `sync_to_async`, поэтому учитываются и запросы
+# асинхронного ORM, которые выполняются на соединениях других потоков.
+current_collector: ContextVar[QueryCollector | None] = ContextVar(
+    'current_collector', default=None
+)
+
+
+def collect_queries(execute, sql, params, many, context):
+    """Обертка `execute_wrapper` всех соединений: передает запрос сборщику
+    текущего HTTP запроса, если он есть"""
+    collector = current_collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    return collector(execute, sql, params, many, context)
+
+
+def install_query_collector(sender, connection, **kwargs):
+    """Подключает `collect_queries` к соединению"""
+    if collect_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(collect_queries)
+
+
+class AsyncCapableMiddleware:
+    """Основа middleware, работающего и в синхронном, и в асинхронном
+    режиме: в режиме ASGI асинхронные вьюхи не переключаются в поток
+    ради синхронного middleware"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        return self.call(request)
+
+    def call(self, request):
+        raise NotImplementedError
+
+    async def acall(self, request):
+        raise NotImplementedError
+
+
+class QueryBudgetMiddleware(AsyncCapableMiddleware):
+    """Считает запросы к базе данных, время их выполнения и повторяющиеся
+    формы запросов для каждого HTTP запроса. При превышении бюджета
+    эндпоинта или обнаружении N+1 пишет отчет в лог, а в строгом режиме
+    выбрасывает `QueryBudgetExceeded`."""
+
+    def __init__(self, get_response):
+        self.config = settings.QUERY_BUDGET
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        connection_created.connect(
+            install_query_collector, dispatch_uid='query_budget'
+        )
+        for connection in connections.all(initialized_only=True):
+            install_query_collector(None, connection)
+
+    def call(self, request):
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        self.check_budget(request, collector)
+        return response
+
+    async def acall(self, request):
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        self.check_budget(request, collector)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминает имя эндпоинта в виде `View.action`"""
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            request.query_budget_endpoint = view_func.__name__
+            return None
+        method = request.method.lower()
+        actions = getattr(view_func, 'actions', None) or {}
+        request.query_budget_endpoint = (
+            f'{view_class.__name__}.{actions.get(method, method)}'
+        )
+        return None
+
+    def check_budget(self, request, collector: QueryCollector) -> None:
+        """Сравнивает собранную статистику с бюджетом эндпоинта"""
+        endpoint = getattr(request, 'query_budget_endpoint', request.path)
+        budget = self.config['ENDPOINTS'].get(
+            endpoint, self.config['DEFAULT_MAX_QUERIES']
+        )
+        repeated = collector.repeated(self.config['N_PLUS_ONE_THRESHOLD'])
+        if collector.count <= budget and not repeated:
+            return
+        report = [
+            f'{endpoint}: {collector.count} запросов (бюджет {budget}), '
+            f'{collector.duration * 1000:.1f} мс'
+        ]
+        report += [
+            f'  N+1: {count} x {sql}' for sql, count in repeated
+        ]
+        report = '\n'.join(report)
+        if self.config['STRICT']:
+            raise QueryBudgetExceeded(report)
+        logger.warning(report)
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """Направляет чтение GET и HEAD запросов к API рецептов, тегов,
+    ингредиентов и пользователей на реплику базы данных. После любого
+    изменяющего запроса клиенту ставится cookie, и пока она не истекла, его
+    чтение идет с основной базы данных: клиент видит свои изменения, даже
+    если реплика отстает. Без настроенной реплики не подключается."""
+
+    def __init__(self, get_response):
+        self.config = settings.DATABASE_REPLICA
+        if self.config['ALIAS'] not in settings.DATABASES:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def use_replica(self, request) -> bool:
+        """Можно ли читать данные запроса с реплики"""
+        return (
+            request.method in ('GET', 'HEAD')
+            and request.path.startswith(self.config['PATHS'])
+            and self.config['PIN_COOKIE'] not in request.COOKIES
+        )
+
+    def pin_to_primary(self, request, response) -> None:
+        """После изменяющего запроса ставит cookie чтения с основной базы
+        данных"""
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                self.config['PIN_COOKIE'],
+                '1',
+                max_age=self.config['PIN_SECONDS'],
+                httponly=True,
+                samesite='Lax',
+            )
+
+    def call(self, request):
+        token = read_from_replica.set(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        self.pin_to_primary(request, response)
+        return response
+
+    async def acall(self, request):
+        token = read_from_replica.set(self.use_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        self.pin_to_primary(request, response)
+        return response
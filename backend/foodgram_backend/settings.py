@@ -14,6 +14,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from foodgram_backend import constants
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,6 +32,11 @@ SECRET_KEY = getenv('DJANGO_SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = getenv('DJANGO_DEBUG') == 'True'
 
+# Режим ASGI (uvicorn воркеры gunicorn, см. gunicornconfig.py): GET
+# запросы к рецептам, тегам, ингредиентам и подпискам обрабатываются
+# асинхронными вьюхами, остальные - синхронными вьюсетами в потоке.
+ASYNC_READ_VIEWS = getenv('DJANGO_ASGI') == 'True'
+
 
 INTERNAL_IPS = ['127.0.0.1', ]
 
@@ -77,12 +84,14 @@ if DEBUG:
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram_backend.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'foodgram_backend.middleware.QueryBudgetMiddleware',
 ]
 if DEBUG:
     MIDDLEWARE += ["debug_toolbar.middleware.DebugToolbarMiddleware"]
@@ -120,9 +129,75 @@ DATABASES = {
         'HOST': getenv('DJANGO_DB_HOST'),
         'PORT': getenv('DJANGO_DB_PORT'),
         'ATOMIC_REQUESTS': True,
+        # Постоянные соединения: воркер gunicorn обрабатывает запросы
+        # последовательно и держит не больше одного соединения, которое
+        # живет CONN_MAX_AGE секунд и проверяется перед использованием в
+        # новом запросе. В режиме ASGI каждый запрос выполняет запросы к
+        # базе данных в своем потоке, постоянные соединения
+        # переиспользуются хуже и копятся, поэтому по умолчанию отключены
+        # отдельной настройкой.
+        'CONN_MAX_AGE': int(getenv(
+            'DJANGO_ASGI_DB_CONN_MAX_AGE', constants.ASGI_DB_CONN_MAX_AGE
+        )) if ASYNC_READ_VIEWS else int(getenv(
+            'DJANGO_DB_CONN_MAX_AGE', constants.DB_CONN_MAX_AGE
+        )),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Реплика только для чтения подключается, если указан ее хост. Чтение
+# безопасных запросов к API направляется на нее роутером и
+# `ReplicaRoutingMiddleware`, запись и миграции - на основную базу данных.
+DATABASE_REPLICA = {
+    'ALIAS': 'replica',
+    'PATHS': (
+        '/api/recipes/', '/api/tags/', '/api/ingredients/', '/api/users/'
+    ),
+    'PIN_COOKIE': 'db_primary',
+    'PIN_SECONDS': int(getenv(
+        'DJANGO_DB_REPLICA_PIN_SECONDS', constants.DB_REPLICA_PIN_SECONDS
+    )),
+}
+if getenv('DJANGO_DB_REPLICA_HOST'):
+    DATABASES[DATABASE_REPLICA['ALIAS']] = {
+        **DATABASES['default'],
+        'HOST': getenv('DJANGO_DB_REPLICA_HOST'),
+        'PORT': getenv('DJANGO_DB_REPLICA_PORT', getenv('DJANGO_DB_PORT')),
+        # Только чтение, транзакция на весь запрос не нужна.
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['foodgram_backend.db_router.ReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Файловый кеш общий для всех воркеров gunicorn и процессов на одном
+# хосте: в docker-compose каталог кеша - общий том backend и воркеров
+# изображений и выгрузок. Сброс кеша в одном процессе виден остальным,
+# но не контейнерам на других хостах: при нескольких хостах нужен сетевой
+# бэкенд (Redis, Memcached). Каждая запись в файловый кеш просматривает
+# каталог, поэтому MAX_ENTRIES рассчитан на ключи ответов для анонимных
+# пользователей, множества избранного и корзин, количества записей и
+# версии, а не на все данные приложения.
+
+CACHE_BACKEND = getenv(
+    'DJANGO_CACHE_BACKEND',
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': getenv('DJANGO_CACHE_LOCATION', '/tmp/foodgram_cache'),  # noqa: S108
+    }
+}
+if CACHE_BACKEND.endswith(('.FileBasedCache', '.LocMemCache')):
+    # Сетевые бэкенды передают OPTIONS клиенту и сами ограничивают память.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(getenv(
+            'DJANGO_CACHE_MAX_ENTRIES', constants.CACHE_MAX_ENTRIES
+        )),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -172,6 +247,16 @@ MEDIA_ROOT = '/media'
 
 MEDIA_URL = '/media/'
 
+# Максимальный размер изображения рецепта в base64 (после декодирования).
+# Тело запроса ограничено размером изображения в base64 с запасом на
+# остальные поля.
+IMAGE_UPLOAD_MAX_SIZE = int(getenv(
+    'DJANGO_IMAGE_UPLOAD_MAX_SIZE', constants.IMAGE_UPLOAD_MAX_SIZE
+))
+DATA_UPLOAD_MAX_MEMORY_SIZE = (
+    IMAGE_UPLOAD_MAX_SIZE * 4 // 3 + constants.DATA_UPLOAD_EXTRA_SIZE
+)
+
 USERNAME_CHARSET = r'^[\w.@+-]+$'
 
 REST_FRAMEWORK = {
@@ -187,3 +272,22 @@ REST_FRAMEWORK = {
 DJOSER = {
     'LOGIN_FIELD': 'email',
 }
+
+# Бюджет запросов к базе данных на один HTTP запрос.
+# Ключи ENDPOINTS имеют вид `View.action`, например `RecipeViewSet.list`
+# или `Subscriptions.get`. В строгом режиме превышение бюджета или N+1
+# приводит к исключению, иначе отчет пишется в лог.
+QUERY_BUDGET = {
+    'ENABLED': getenv('DJANGO_QUERY_BUDGET_ENABLED', str(DEBUG)) == 'True',
+    'STRICT': getenv('DJANGO_QUERY_BUDGET_STRICT') == 'True',
+    'DEFAULT_MAX_QUERIES': constants.QUERY_BUDGET_DEFAULT_MAX_QUERIES,
+    'N_PLUS_ONE_THRESHOLD': constants.QUERY_BUDGET_N_PLUS_ONE_THRESHOLD,
+    'ENDPOINTS': {
+        'RecipeViewSet.list': 10,
+        'RecipeViewSet.retrieve': 10,
+        'UserViewSet.list': 5,
+        'Subscriptions.get': 10,
+        'TagViewSet.list': 3,
+        'IngredientViewSet.list': 3,
+    },
+}
@@ -3,15 +3,100 @@
 # https://docs.gunicorn.org/en/stable/settings.html
 
 import multiprocessing
+import os
+import sys
+from os import getenv
+from pathlib import Path
 
 bind = '0.0.0.0:8000'
 # О настройке `workers` см:
 # https://github.com/wemake-services/wemake-django-template/issues/1022
-workers = multiprocessing.cpu_count() * 2 + 1
+workers = int(
+    getenv('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1
+)
+threads = 1
+
+# Режим ASGI: воркеры uvicorn и асинхронные вьюхи чтения (см.
+# ASYNC_READ_VIEWS в settings.py). Воркер обслуживает много одновременных
+# медленных клиентов, не занимая поток на каждый запрос.
+asgi = getenv('DJANGO_ASGI') == 'True'
+if asgi:
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'foodgram_backend.asgi:application'
+else:
+    wsgi_app = 'foodgram_backend.wsgi:application'
 
 max_requests = 2000
 max_requests_jitter = 400
 
 log_file = '-'
-chdir = '/code'
+# Каталог бэкенда (/code в контейнере).
+chdir = str(Path(__file__).resolve().parent)
 worker_tmp_dir = '/dev/shm'  # noqa: S108
+
+# Каждый поток воркера держит одно постоянное соединение с каждой базой
+# данных (см. CONN_MAX_AGE в settings.py), пул соединений приложения к
+# одной базе данных - `workers * threads`. В режиме ASGI постоянные
+# соединения по умолчанию отключены (DJANGO_ASGI_DB_CONN_MAX_AGE):
+# соединение открывается на время запроса, и их число равно числу
+# одновременно обрабатываемых запросов.
+
+
+def on_starting(server):
+    """Проверяет, что пул соединений с базой данных помещается в
+    `max_connections` сервера, и пишет в лог его размер. При нехватке
+    соединений gunicorn не запускается. Если база данных недоступна,
+    проверка пропускается: воркеры подключатся, когда она запустится."""
+    # Значения из конфигурации сервера учитывают аргументы командной строки.
+    workers, threads = server.cfg.workers, server.cfg.threads
+    if asgi:
+        server.log.warning(
+            'Режим ASGI: %s воркеров uvicorn, время жизни соединения с '
+            'базой данных %s с (DJANGO_ASGI_DB_CONN_MAX_AGE), число '
+            'соединений не ограничено пулом',
+            workers,
+            getenv('DJANGO_ASGI_DB_CONN_MAX_AGE') or 0,
+        )
+        return
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings'
+    )
+    import django
+
+    django.setup()
+    from django.core.exceptions import ImproperlyConfigured
+    from django.db import OperationalError
+
+    from app.core.connections import check_connection_budget
+
+    try:
+        check_connection_budget(workers * threads)
+    except ImproperlyConfigured as error:
+        server.log.error('%s', error)
+        sys.exit(1)
+    except OperationalError as error:
+        server.log.warning(
+            'Проверка max_connections пропущена, база данных '
+            'недоступна: %s',
+            error,
+        )
+    server.log.info(
+        'Соединений с каждой базой данных: до %s (%s воркеров x %s потоков)',
+        workers * threads, workers, threads,
+    )
+
+
+def worker_exit(server, worker):
+    """Пишет в лог статистику соединений завершающегося воркера. Воркеры
+    перезапускаются после `max_requests` запросов, поэтому статистика
+    появляется в логе регулярно."""
+    from app.core.connections import connection_stats
+
+    server.log.info(
+        'Воркер %s, соединения с базой данных: %s',
+        worker.pid,
+        ', '.join(
+            f'{name}={value}'
+            for name, value in sorted(connection_stats().items())
+        ),
+    )